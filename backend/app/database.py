@@ -1,9 +1,67 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./smartspend.db"#Kade se chuva datata,go kreira smart_spend.db
+from app.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+from app.utils.metrics import instrument_engine
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})#Konekcijata so databazata 
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: chitachite ne gi blokiraat pisachite; NORMAL: bez fsync na sekoj commit
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def _engine_kwargs(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    # PostgreSQL (ili druga server baza) so connection pool
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+
+def _create_engine(url: str):
+    engine = create_engine(url, **_engine_kwargs(url))
+    if url.startswith("sqlite"):
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+def _create_async_engine(url: str):
+    kwargs = _engine_kwargs(url)
+    if url.startswith("sqlite"):
+        kwargs = {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    engine = create_async_engine(url, **kwargs)
+    if url.startswith("sqlite"):
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+engine = _create_engine(DATABASE_URL)#Konekcijata so databazata 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# Async varijanta za async def routes
+async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()#Parent class za site modeli,so ova go pravime modelot table
@@ -1,12 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, expenses, categories,predict
+from fastapi.responses import PlainTextResponse
+from app.config import GZIP_MIN_SIZE
+from app.routes import analytics, auth, budgets, expenses, categories,predict, recurring, sync
 from app.database import engine
+from app.migrations import run_migrations
 from app.models import Base
+from app.utils import metrics
+from app.utils import recurring as recurring_scheduler
+from app.utils.compression import GZipMiddleware
+from app.utils.analytics import analytics_cache
+from app.utils.budgets import budget_cache
+from app.utils.categories import category_cache
+from app.utils.dependencies import user_cache
+from app.utils.nlp import prediction_cache
+from app.utils.overrides import override_cache
 Base.metadata.create_all(bind=engine)#Koga FastApi ke startne avtomatski kreira tabela ako ne postoi databazata ja kreira
+run_migrations(engine)#Kolonite/indeksite dodadeni podocna vo postoechki bazi
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recurring expenses vo pozadina (SMARTSPEND_RECURRING_INTERVAL=0 go iskluchuva)
+    recurring_scheduler.start_scheduler()
+    yield
+    recurring_scheduler.stop_scheduler()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for Flutter web
 app.add_middleware(
@@ -15,13 +38,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing", "Retry-After"],
 )
+# Golemite listi (GET /expenses/, export) se prakjaat kompresirani;
+# export?gzip=true (application/gzip) ne se kompresira vtor pat
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+# Najnadvoreshen, za da go meri i vremeto na kompresija
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(expenses.router, prefix="/expenses", tags=["expenses"])#Site endpoints vo expenses.py ke pochnat so /expenses
 app.include_router(categories.router, prefix="/categories", tags=["categories"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 app.include_router(predict.router, prefix="/ml") 
+app.include_router(sync.router, prefix="/sync", tags=["sync"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(budgets.router, prefix="/budgets", tags=["budgets"])
+app.include_router(recurring.router, prefix="/recurring", tags=["recurring"])
 @app.get("/")
 def root():
-    return {"message": "SmartSpend API is running"}
\ No newline at end of file
+    return {"message": "SmartSpend API is running"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(
+        metrics.render({
+            "users": user_cache,
+            "predictions": prediction_cache,
+            "overrides": override_cache,
+            "categories": category_cache,
+            "analytics": analytics_cache,
+            "budgets": budget_cache,
+        }),
+        media_type="text/plain; version=0.0.4",
+    )
\ No newline at end of file
@@ -0,0 +1,173 @@
+# backend/app/migrations.py
+# Mali, numerirani migracii vo stilot na Alembic za postoechki bazi.
+# create_all gi kreira samo novite tabeli; ova gi dodava kolonite i
+# indeksite sho se dodadeni podocna vo models.py.
+#
+#   python -m app.migrations            (primeni gi site sho falat)
+#   python -m app.migrations --status   (prikazhi primeneti/chekaat)
+#
+# Sekoja migracija e idempotentna, pa e bezbedno povekje uvicorn workeri
+# da startuvaat istovremeno.
+import argparse
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app import models
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("revision", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str):
+    if not _has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_indexes(conn: Connection, table: Table, names: tuple[str, ...] | None = None):
+    # Samo imenuvanite indeksi: podocnezhnite mozhe da baraat koloni sho
+    # ushte gi nema vo stara baza
+    for index in table.indexes:
+        if names is None or index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def m0001_expense_indexes(conn: Connection):
+    _create_indexes(conn, models.Expense.__table__, ("ix_expenses_user_date_category", "ix_expenses_user_date_id"))
+
+
+def m0002_user_token_version(conn: Connection):
+    _add_column(conn, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def m0003_correction_normalized_description(conn: Connection):
+    _add_column(conn, "category_corrections", "normalized_description", "VARCHAR")
+
+
+def m0004_backfill_rollups(conn: Connection):
+    from sqlalchemy.orm import Session
+    from app.utils import rollups
+
+    has_rollups = conn.execute(select(models.MonthlyRollup.user_id).limit(1)).first()
+    has_expenses = conn.execute(select(models.Expense.id).limit(1)).first()
+    if has_expenses and not has_rollups:
+        with Session(bind=conn) as db:
+            rollups.rebuild(db)
+
+
+def m0005_unique_category_names(conn: Connection):
+    # Spoj gi duplikatite (ist user_id + name) vo najstarata kategorija pred indeksot
+    from sqlalchemy.orm import Session
+    from app.utils import rollups
+
+    categories = models.Category.__table__
+    keep = (
+        select(categories.c.user_id, categories.c.name, func.min(categories.c.id).label("id"))
+        .group_by(categories.c.user_id, categories.c.name)
+        .having(func.count() > 1)
+    ).subquery()
+    duplicates = conn.execute(
+        select(categories.c.id, keep.c.id, categories.c.user_id)
+        .join(keep, (categories.c.user_id == keep.c.user_id) & (categories.c.name == keep.c.name))
+        .where(categories.c.id != keep.c.id)
+    ).all()
+
+    for duplicate_id, keep_id, _ in duplicates:
+        # Bez models.Expense: onupdate bi postavil updated_at, kolona od 0007
+        conn.execute(
+            text("UPDATE expenses SET category_id = :keep WHERE category_id = :duplicate"),
+            {"keep": keep_id, "duplicate": duplicate_id},
+        )
+        conn.execute(categories.delete().where(categories.c.id == duplicate_id))
+
+    if duplicates:
+        with Session(bind=conn) as db:
+            for user_id in {user_id for _, _, user_id in duplicates}:
+                rollups.rebuild(db, user_id)
+
+    _create_indexes(conn, categories)
+
+
+def m0006_user_data_version(conn: Connection):
+    _add_column(conn, "users", "data_version", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "users", "data_modified_at", "DATETIME")
+
+
+def m0007_sync_columns(conn: Connection):
+    for table in ("expenses", "categories"):
+        _add_column(conn, table, "change_version", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, table, "updated_at", "DATETIME")
+    _create_indexes(conn, models.Expense.__table__, ("ix_expenses_user_change_version",))
+
+
+def m0008_expense_search(conn: Connection):
+    from app.utils import search
+
+    search.create_index(conn)
+
+
+MIGRATIONS = [
+    ("0001_expense_indexes", m0001_expense_indexes),
+    ("0002_user_token_version", m0002_user_token_version),
+    ("0003_correction_normalized_description", m0003_correction_normalized_description),
+    ("0004_backfill_rollups", m0004_backfill_rollups),
+    ("0005_unique_category_names", m0005_unique_category_names),
+    ("0006_user_data_version", m0006_user_data_version),
+    ("0007_sync_columns", m0007_sync_columns),
+    ("0008_expense_search", m0008_expense_search),
+]
+
+
+def applied_revisions(engine: Engine) -> set[str]:
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(select(schema_migrations.c.revision))}
+
+
+def run_migrations(engine: Engine) -> list[str]:
+    """
+    Apply every migration that is not recorded in schema_migrations yet,
+    each in its own transaction. Returns the revisions that were applied.
+    """
+    done = applied_revisions(engine)
+    applied = []
+    for revision, upgrade in MIGRATIONS:
+        if revision in done:
+            continue
+        with engine.begin() as conn:
+            upgrade(conn)
+            # Drug worker mozhebi ja zapishal istovremeno
+            exists = conn.execute(
+                select(schema_migrations.c.revision).where(schema_migrations.c.revision == revision)
+            ).first()
+            if not exists:
+                conn.execute(schema_migrations.insert().values(revision=revision, applied_at=datetime.utcnow()))
+        applied.append(revision)
+    return applied
+
+
+if __name__ == "__main__":
+    from app.database import Base, engine
+
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="only list migrations")
+    args = parser.parse_args()
+
+    if args.status:
+        done = applied_revisions(engine)
+        for revision, _ in MIGRATIONS:
+            print(f"{'applied' if revision in done else 'pending':<8} {revision}")
+    else:
+        Base.metadata.create_all(bind=engine)
+        for revision in run_migrations(engine):
+            print("Applied", revision)
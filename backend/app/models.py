@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -8,6 +8,9 @@ class User(Base):#Ja definirame strukturata na tabelata
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     password = Column(String)
+    token_version = Column(Integer, nullable=False, default=0)  # +1 gi povlekuva site tokeni
+    data_version = Column(Integer, nullable=False, default=0)  # +1 na sekoja promena na expenses/kategorii
+    data_modified_at = Column(DateTime, nullable=True)
 
     expenses = relationship("Expense", back_populates="user")
     categories = relationship("Category", back_populates="user")
@@ -18,10 +21,18 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"))
+    # Za delta sync: data_version na korisnikot pri poslednata promena
+    change_version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="categories")
     expenses = relationship("Expense", back_populates="category")
 
+    __table_args__ = (
+        # Edno ime po korisnik, i za istovremeni insert-i
+        Index("ux_categories_user_name", "user_id", "name", unique=True),
+    )
+
 
 class Expense(Base):
     __tablename__ = "expenses"
@@ -31,6 +42,92 @@ class Expense(Base):
     amount = Column(Float)
     description = Column(String)
     date = Column(DateTime, default=datetime.utcnow)
+    change_version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="expenses")
     category = relationship("Category", back_populates="expenses")
+
+    # Summary queries filter po (user_id, date) i grupiraat po category_id;
+    # amount e vo indeksot za da ne se chita tabelata voopshto
+    __table_args__ = (
+        Index("ix_expenses_user_date_category", "user_id", "date", "category_id", "amount"),
+        # Keyset paginacija po (date, id)
+        Index("ix_expenses_user_date_id", "user_id", "date", "id"),
+        Index("ix_expenses_user_change_version", "user_id", "change_version"),
+    )
+
+
+class MonthlyRollup(Base):
+    # Materijaliziran zbir po (user, mesec, kategorija), se odrzhuva pri sekoja promena na expense
+    __tablename__ = "monthly_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class CategoryCorrection(Base):
+    # Koga korisnikot ja menuva kategorijata na expense - podatoci za retrain
+    __tablename__ = "category_corrections"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    expense_id = Column(Integer)  # bez FK - korekcijata ostanuva i ako expense se izbrishe
+    description = Column(String)
+    normalized_description = Column(String)  # kluch za per-user override pri predict
+    old_category = Column(String)
+    new_category = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    trained_version = Column(String, nullable=True, index=True)  # None = se ushte ne e vo model
+
+
+class Tombstone(Base):
+    # Izbrishani expenses/kategorii, za da gi izbrishe i klientot pri sync
+    __tablename__ = "tombstones"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False)  # "expense" | "category"
+    entity_id = Column(Integer, nullable=False)
+    change_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_tombstones_user_change_version", "user_id", "change_version"),
+    )
+
+
+class Budget(Base):
+    # Mesechen limit po kategorija; potroshenoto doagja od monthly_rollups
+    __tablename__ = "budgets"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ux_budgets_user_category", "user_id", "category_id", unique=True),
+    )
+
+
+class RecurringExpense(Base):
+    # Shablon (kirija, pretplati) od koj schedulerot kreira expenses
+    __tablename__ = "recurring_expenses"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    description = Column(String, nullable=False)
+    interval = Column(String, nullable=False)  # "weekly" | "monthly" | "yearly"
+    start_date = Column(DateTime, nullable=False)  # denot vo mesecot se zema od ova
+    next_run = Column(DateTime, nullable=False)
+    last_run = Column(DateTime, nullable=True)
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Schedulerot bara aktivni so next_run <= sega
+        Index("ix_recurring_active_next_run", "active", "next_run"),
+    )
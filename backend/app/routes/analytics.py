@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.utils.analytics import get_analytics
+from app.utils.dependencies import CurrentUser, get_current_user, get_db
+from app.utils.ratelimit import rate_limit
+
+router = APIRouter(dependencies=[Depends(rate_limit("analytics"))])
+
+# Pandas presmetkite se CPU rabota, pa ovie se sync (threadpool)
+
+
+@router.get("/trends")
+def get_trends(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return get_analytics(db, current_user.id).trends()
+
+
+@router.get("/rolling")
+def get_rolling_averages(
+    window: int = Query(30, ge=1, le=365),
+    days: int = Query(90, ge=0, le=3650),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return get_analytics(db, current_user.id).rolling(window, days)
+
+
+@router.get("/merchants")
+def get_top_merchants(
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return get_analytics(db, current_user.id).merchants(limit)
+
+
+@router.get("/anomalies")
+def get_anomalies(
+    threshold: float = Query(3.5, gt=0),
+    min_count: int = Query(5, ge=2),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return get_analytics(db, current_user.id).anomalies(threshold, min_count, limit)
+
+
+@router.get("/dashboard")
+def get_dashboard(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Site widgets so default parametri, od eden scan
+    analytics = get_analytics(db, current_user.id)
+    return {
+        "trends": analytics.trends(),
+        "rolling": analytics.rolling(30, 90),
+        "merchants": analytics.merchants(10),
+        "anomalies": analytics.anomalies(3.5, 5, 50),
+    }
@@ -1,48 +1,105 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import User
-from app.schemas import UserCreate, UserLogin
-from app.utils.security import hash_password, verify_password
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import (
+    Budget,
+    Category,
+    CategoryCorrection,
+    Expense,
+    MonthlyRollup,
+    RecurringExpense,
+    Tombstone,
+    User,
+)
+from app.schemas import PasswordChange, UserCreate, UserLogin
+from app.utils import budgets, categories, overrides
+from app.utils.dependencies import CurrentUser, get_async_db, get_current_user_async, invalidate_user
+from app.utils.ratelimit import rate_limit
+from app.utils.security import hash_password_async, verify_and_update_password_async
 from app.utils.security import create_access_token
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _token_for(user: User) -> str:
+    return create_access_token({
+        "sub": user.username,
+        "uid": user.id,
+        "ver": user.token_version or 0,
+    })
+
+async def _find_user(db: AsyncSession, username: str) -> User | None:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
 # 🔹 SIGNUP
-@router.post("/signup")
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.username == user.username).first()
+@router.post("/signup", dependencies=[Depends(rate_limit("signup"))])
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await _find_user(db, user.username)
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
 
     new_user = User(
         username=user.username,
-        password=hash_password(user.password)
+        password=await hash_password_async(user.password)
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
 
     return {"message": "User created successfully"}
 
 # 🔹 LOGIN
-@router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
+@router.post("/login", dependencies=[Depends(rate_limit("login"))])
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await _find_user(db, user.username)
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not verify_password(user.password, db_user.password):
+    valid, new_hash = await verify_and_update_password_async(user.password, db_user.password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_access_token({"sub": db_user.username})
+    if new_hash:
+        # BCRYPT_ROUNDS e smenet - go zachuvuvame hashot so noviot cost
+        db_user.password = new_hash
+        await db.commit()
+
+    token = _token_for(db_user)
 
     return {"access_token": token, "token_type": "bearer"}
+
+# 🔹 CHANGE PASSWORD - gi povlekuva site postoechki tokeni
+@router.post("/change-password", dependencies=[Depends(rate_limit("password"))])
+async def change_password(
+    data: PasswordChange,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    db_user = await db.get(User, current_user.id)
+    valid, _ = await verify_and_update_password_async(data.old_password, db_user.password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    db_user.password = await hash_password_async(data.new_password)
+    db_user.token_version = (db_user.token_version or 0) + 1
+    await db.commit()
+    invalidate_user(db_user.id)
+
+    return {"access_token": _token_for(db_user), "token_type": "bearer"}
+
+# 🔹 DELETE ACCOUNT
+@router.delete("/me")
+async def delete_account(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    for model in (CategoryCorrection, MonthlyRollup, Tombstone, Budget, RecurringExpense, Expense, Category):
+        await db.execute(delete(model).where(model.user_id == current_user.id))
+    await db.execute(delete(User).where(User.id == current_user.id))
+    await db.commit()
+    invalidate_user(current_user.id)
+    overrides.invalidate(current_user.id)
+    categories.invalidate(current_user.id)
+    budgets.invalidate(current_user.id)
+
+    return {"message": "User deleted successfully"}
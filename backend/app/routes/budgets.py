@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.schemas import BudgetSet, BudgetStatus
+from app.utils import budgets, categories
+from app.utils.dependencies import CurrentUser, get_async_db, get_current_user_async
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[BudgetStatus])
+async def get_budgets(
+    year: int | None = None,
+    month: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    now = datetime.utcnow()
+    year, month = year or now.year, month or now.month
+    if month < 1 or month > 12:
+        raise HTTPException(status_code=400, detail="Invalid month (1-12)")
+    return await db.run_sync(budgets.month_status, current_user.id, year, month)
+
+
+@router.put("/{category}", response_model=BudgetStatus)
+async def set_budget(
+    category: str,
+    budget: BudgetSet,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    category_ids, created = await db.run_sync(categories.get_or_create, current_user.id, [category])
+    category_id = category_ids[category]
+
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(models.Budget).values(
+        user_id=current_user.id, category_id=category_id, amount=budget.amount, updated_at=datetime.utcnow(),
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "category_id"],
+        set_={"amount": stmt.excluded.amount, "updated_at": stmt.excluded.updated_at},
+    ))
+    await db.commit()
+    budgets.invalidate(current_user.id)
+    if created:
+        categories.invalidate(current_user.id)
+
+    return await db.run_sync(budgets.check, current_user.id, category_id, datetime.utcnow())
+
+
+@router.delete("/{category}")
+async def delete_budget(
+    category: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    category_id = (await db.run_sync(categories.get_category_ids, current_user.id)).get(category)
+    if category_id is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+
+    result = await db.execute(
+        delete(models.Budget).where(
+            models.Budget.user_id == current_user.id,
+            models.Budget.category_id == category_id,
+        )
+    )
+    await db.commit()
+    budgets.invalidate(current_user.id)
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Budget not found")
+
+    return {"message": "Budget deleted successfully"}
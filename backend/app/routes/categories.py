@@ -1,27 +1,30 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.utils.dependencies import get_db
-from app import models
-from app.utils.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.dependencies import get_async_db
+from app.utils import categories, data_version
+from app.utils.dependencies import CurrentUser, get_current_user_async
 
 router = APIRouter(tags=["Categories"])
 
 
 @router.get("/")
-def get_categories(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+async def get_categories(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
-    categories = (
-        db.query(models.Category)
-        .filter(models.Category.user_id == current_user.id)
-        .all()
-    )
+    headers, not_modified = await data_version.validators(request, db, current_user.id)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    category_ids = await db.run_sync(categories.get_category_ids, current_user.id)
 
     return [
         {
-            "id": category.id,
-            "name": category.name
+            "id": category_id,
+            "name": name
         }
-        for category in categories
+        for name, category_id in category_ids.items()
     ]
@@ -1,103 +1,437 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-from collections import defaultdict
+from typing import Any, Literal
+import base64
+import binascii
+import csv
+import io
+import json
+import zlib
 
-from app.schemas import ExpenseCreate, ExpenseUpdate, ExpenseResponse, MonthlySummary
+from app.config import BULK_CHUNK_SIZE, EXPORT_CHUNK_SIZE, MAX_PAGE_SIZE
+from app.schemas import (
+    BulkExpenseResult,
+    ExpenseCreate,
+    ExpenseCreated,
+    ExpenseFilters,
+    ExpenseUpdate,
+    ExpenseResponse,
+    MonthlySummary,
+    RangeSummary,
+    UTCDateTime,
+)
 from app import models
-from app.utils.dependencies import get_current_user, get_db
-from app.utils.nlp import predict_category
+from app.utils import aggregates, budgets, categories, data_version, metrics, overrides, rollups, search
+from app.database import AsyncSessionLocal, SessionLocal
+from app.utils.dependencies import (
+    CurrentUser,
+    get_async_db,
+    get_current_user,
+    get_current_user_async,
+    get_db,
+)
+from app.utils.nlp import get_normalizer, predict_categories, predict_category_async
+from app.utils.ratelimit import rate_limit
+from app.utils.singleflight import SingleFlight
 
 router = APIRouter()
 
+# Ist korisnik + mesec + verzija na podatocite istovremeno = edno chitanje
+summary_flight = SingleFlight("summary")
+
+
+EXPENSE_FIELDS = {
+    "id": models.Expense.id,
+    "amount": models.Expense.amount,
+    "description": models.Expense.description,
+    "category": models.Category.name,
+    "user_id": models.Expense.user_id,
+    "date": models.Expense.date,
+}
+DEFAULT_FIELDS = ["id", "amount", "description", "category", "user_id"]
+
+
+def _parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return DEFAULT_FIELDS
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPENSE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _encode_cursor(date: datetime, expense_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{expense_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        date, expense_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(date), int(expense_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _expense_select(user_id: int, fields: list[str], filters: ExpenseFilters):
+    """
+    SELECT of the requested columns of a user's expenses joined with their
+    category, newest first. date and id are always selected for the cursor.
+    """
+    columns = [EXPENSE_FIELDS[name].label(name) for name in fields]
+    columns += [models.Expense.date.label("_date"), models.Expense.id.label("_id")]
+
+    query = (
+        select(*columns)
+        .join(models.Category, models.Category.id == models.Expense.category_id)
+        .where(models.Expense.user_id == user_id)
+    )
+    if filters.start is not None:
+        query = query.where(models.Expense.date >= filters.start)
+    if filters.end is not None:
+        query = query.where(models.Expense.date < filters.end)
+    if filters.category is not None:
+        query = query.where(models.Category.name == filters.category)
+    if filters.min_amount is not None:
+        query = query.where(models.Expense.amount >= filters.min_amount)
+    if filters.max_amount is not None:
+        query = query.where(models.Expense.amount <= filters.max_amount)
+    if filters.q:
+        # %, _ i \ od korisnikot se bukvalni, ne dzhokeri
+        pattern = filters.q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(models.Expense.description.ilike(f"%{pattern}%", escape="\\"))
+
+    return query.order_by(models.Expense.date.desc(), models.Expense.id.desc())
+
+
+def _page(query, limit: int | None, cursor: str | None):
+    # Keyset paginacija po (date, id); bez limit se site redovi
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            or_(
+                models.Expense.date < cursor_date,
+                and_(models.Expense.date == cursor_date, models.Expense.id < cursor_id),
+            )
+        )
+    page_size = min(limit, MAX_PAGE_SIZE) if limit else None
+    if page_size:
+        query = query.limit(page_size + 1)
+    return query, page_size
+
+
+def _page_response(rows, fields: list[str], page_size: int | None, headers: dict) -> JSONResponse:
+    if page_size and len(rows) > page_size:
+        rows = rows[:page_size]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1]._date, rows[-1]._id)
+
+    # Redovite se veke vo finalniot oblik, pa go preskoknuvame response_model
+    with metrics.span("serialize"):
+        return JSONResponse([_row_to_dict(row, fields) for row in rows], headers=headers)
+
+
+def _row_to_dict(row, fields: list[str]) -> dict:
+    item = {name: getattr(row, name) for name in fields}
+    if "date" in item and item["date"] is not None:
+        item["date"] = item["date"].isoformat()
+    return item
+
 
 @router.get("/", response_model=list[ExpenseResponse])
-def get_expenses(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+async def get_expenses(
+    request: Request,
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+    fields: str | None = None,
+    filters: ExpenseFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
-    expenses = (
-        db.query(models.Expense, models.Category)
-        .join(models.Category)
-        .filter(models.Expense.user_id == current_user.id)
-        .all()
-    )
+    # Bez limit se vrakjaat site expenses (kako porano); so limit sledniot
+    # cursor doagja vo X-Next-Cursor headerot
+    field_names = _parse_fields(fields)
+    headers, not_modified = await data_version.validators(request, db, current_user.id)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
 
-    return [
-        {
-            "id": expense.id,
-            "amount": expense.amount,
-            "description": expense.description,
-            "category": category.name,
-            "user_id": expense.user_id,
-        }
-        for expense, category in expenses
-    ]
+    query, page_size = _page(_expense_select(current_user.id, field_names, filters), limit, cursor)
+    rows = (await db.execute(query)).all()
+    return _page_response(rows, field_names, page_size, headers)
 
 
-@router.post("/", response_model=ExpenseResponse)
-def create_expense(
+async def _find_expense(db: AsyncSession, user_id: int, expense_id: int) -> models.Expense | None:
+    result = await db.execute(
+        select(models.Expense).where(
+            models.Expense.id == expense_id,
+            models.Expense.user_id == user_id,
+        )
+    )
+    return result.scalars().first()
+
+
+@router.post("/", response_model=ExpenseCreated)
+async def create_expense(
     expense_data: ExpenseCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
     # Use ML prediction if category not provided
     category_name = expense_data.category
     if category_name is None or category_name.strip() == "":
         try:
-            category_name = predict_category(expense_data.description)
+            user_overrides = await db.run_sync(overrides.get_overrides, current_user.id)
+            category_name = await predict_category_async(expense_data.description, user_overrides)
         except Exception:
             category_name = "Uncategorized"
     
-    category = db.query(models.Category).filter(
-        models.Category.name == category_name,
-        models.Category.user_id == current_user.id
-    ).first()
-
-    if not category:
-        category = models.Category(
-            name=category_name,
-            user_id=current_user.id
-        )
-        db.add(category)
-        db.commit()
-        db.refresh(category)
+    version = await db.run_sync(data_version.bump, current_user.id)
+    category_ids, created = await db.run_sync(
+        categories.get_or_create, current_user.id, [category_name], version
+    )
 
     expense = models.Expense(
         amount=expense_data.amount,
         description=expense_data.description,
-        category_id=category.id,
-        user_id=current_user.id
+        category_id=category_ids[category_name],
+        user_id=current_user.id,
+        date=expense_data.date or datetime.utcnow(),
+        change_version=version,
     )
 
     db.add(expense)
-    db.commit()
-    db.refresh(expense)
+    await db.run_sync(rollups.add_expense, expense)
+    # O(1): keshiran limit + eden rollup red, vo istata transakcija
+    budget = await db.run_sync(budgets.check, current_user.id, expense.category_id, expense.date)
+    await db.commit()
+    if created:
+        categories.invalidate(current_user.id)
 
     return {
         "id": expense.id,
         "amount": expense.amount,
         "description": expense.description,
-        "category": category.name,
-        "user_id": expense.user_id
+        "category": category_name,
+        "user_id": expense.user_id,
+        "budget": budget,
     }
 
 
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _insert_chunk(db: Session, user_id: int, rows: list[ExpenseCreate], version: int) -> int:
+    """
+    Insert one chunk of validated rows: one batched ML pass for the rows
+    without a category, one lookup for the categories and one executemany
+    insert for the expenses. Nothing is committed here.
+    """
+    if not rows:
+        return 0
+
+    # Predict all missing categories at once
+    missing = [data.description for data in rows if not (data.category and data.category.strip())]
+    try:
+        predicted = iter(predict_categories(missing, overrides.get_overrides(db, user_id)))
+    except Exception:
+        predicted = iter(["Uncategorized"] * len(missing))
+    names = [
+        data.category if data.category and data.category.strip() else next(predicted)
+        for data in rows
+    ]
+
+    category_ids, _ = categories.get_or_create(db, user_id, names, version)
+
+    now = datetime.utcnow()
+    values = [
+        {
+            "user_id": user_id,
+            "category_id": category_ids[name],
+            "amount": data.amount,
+            "description": data.description,
+            "date": data.date or now,
+            "change_version": version,
+            "updated_at": now,
+        }
+        for data, name in zip(rows, names)
+    ]
+    db.execute(insert(models.Expense), values)
+    rollups.apply_many(
+        db,
+        [(user_id, v["category_id"], v["date"], v["amount"], 1) for v in values],
+    )
+    return len(rows)
+
+
+def _ingest(db: Session, user_id: int, rows) -> dict:
+    """
+    Validate (row_number, raw_row) pairs and write all valid rows in a single
+    transaction. Invalid rows are reported back instead of aborting the import.
+    """
+    created = 0
+    errors = []
+    chunk = []
+    version = None
+
+    try:
+        for row_number, raw in rows:
+            try:
+                chunk.append(ExpenseCreate.model_validate(raw))
+            except ValidationError as e:
+                errors.append({"row": row_number, "error": _validation_message(e)})
+                continue
+
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                version = version or data_version.bump(db, user_id)
+                created += _insert_chunk(db, user_id, chunk, version)
+                chunk = []
+
+        if chunk:
+            version = version or data_version.bump(db, user_id)
+            created += _insert_chunk(db, user_id, chunk, version)
+        db.commit()
+    finally:
+        # Keshot mozhebi gi vidno nekomitnatite kategorii od ovoj import
+        categories.invalidate(user_id)
+
+    return {"created": created, "errors": errors}
+
+
+@router.post("/bulk", response_model=BulkExpenseResult, dependencies=[Depends(rate_limit("bulk"))])
+def create_expenses_bulk(
+    expenses: list[Any] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # row = index vo JSON nizata
+    return _ingest(db, current_user.id, enumerate(expenses))
+
+
+@router.post("/bulk/csv", response_model=BulkExpenseResult, dependencies=[Depends(rate_limit("bulk"))])
+def create_expenses_bulk_csv(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # CSV so koloni: description, amount, category (opcionalno), date (opcionalno)
+    # row = broj na linija vo fajlot
+    text = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    reader = csv.DictReader(text)
+    rows = (
+        (reader.line_num, {key: value or None for key, value in record.items() if key})
+        for record in reader
+    )
+    try:
+        return _ingest(db, current_user.id, rows)
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {e}")
+
+
+def _export_chunks(query, fields: list[str], fmt: str, compress: bool):
+    # Sopstvena sesija, bidejkji generatorot zhivee podolgo od get_db
+    db = SessionLocal()
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(text: str) -> bytes:
+        return gzip.compress(text.encode()) if gzip else text.encode()
+
+    try:
+        if fmt == "csv":
+            yield encode(",".join(fields) + "\r\n")
+
+        result = db.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for rows in result.partitions():
+            items = [_row_to_dict(row, fields) for row in rows]
+            if fmt == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([item[name] for name in fields] for item in items)
+                chunk = buffer.getvalue()
+            else:
+                chunk = "".join(json.dumps(item) + "\n" for item in items)
+
+            data = encode(chunk)
+            if data:
+                yield data
+
+        if gzip:
+            yield gzip.flush()
+    finally:
+        db.close()
+
+
+@router.get("/export", dependencies=[Depends(rate_limit("export"))])
+def export_expenses(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    fields: str | None = None,
+    filters: ExpenseFilters = Depends(),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    field_names = _parse_fields(fields or ",".join(EXPENSE_FIELDS))
+    query = _expense_select(current_user.id, field_names, filters)
+
+    filename = f"expenses.{format}"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        _export_chunks(query, field_names, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/search", response_model=list[ExpenseResponse], dependencies=[Depends(rate_limit("search"))])
+async def search_expenses(
+    request: Request,
+    limit: int = Query(50, ge=1),
+    cursor: str | None = None,
+    fuzzy: bool = True,
+    fields: str | None = None,
+    filters: ExpenseFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    # q = zborovi (prefiks, so tolerancija na typos); filtrite i cursor kako kaj GET /expenses/
+    if not filters.q or not search.terms(filters.q):
+        raise HTTPException(status_code=400, detail="Search query q is required")
+    field_names = _parse_fields(fields)
+    headers, not_modified = await data_version.validators(request, db, current_user.id)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    query = _expense_select(current_user.id, field_names, filters.model_copy(update={"q": None}))
+    query = await db.run_sync(search.search_select, query, current_user.id, filters.q, fuzzy)
+    query, page_size = _page(query, limit, cursor)
+    rows = (await db.execute(query)).all()
+    return _page_response(rows, field_names, page_size, headers)
+
+
 @router.get("/{expense_id}", response_model=ExpenseResponse)
-def get_expense(
+async def get_expense(
     expense_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
-    expense = (
-        db.query(models.Expense, models.Category)
+    result = await db.execute(
+        select(models.Expense, models.Category)
         .join(models.Category)
-        .filter(
+        .where(
             models.Expense.id == expense_id,
             models.Expense.user_id == current_user.id
         )
-        .first()
     )
+    expense = result.first()
     
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
@@ -113,52 +447,61 @@ def get_expense(
 
 
 @router.put("/{expense_id}", response_model=ExpenseResponse)
-def update_expense(
+async def update_expense(
     expense_id: int,
     expense_update: ExpenseUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
-    expense = db.query(models.Expense).filter(
-        models.Expense.id == expense_id,
-        models.Expense.user_id == current_user.id
-    ).first()
+    expense = await _find_expense(db, current_user.id, expense_id)
     
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    category = None
+    old = (expense.category_id, expense.date, expense.amount)
+    category_name = expense_update.category
+    category_id = None
+    created = False
+    version = await db.run_sync(data_version.bump, current_user.id)
+    expense.change_version = version
     
-    if expense_update.category is not None:
-        category = db.query(models.Category).filter(
-            models.Category.name == expense_update.category,
-            models.Category.user_id == current_user.id
-        ).first()
-        
-        if not category:
-            category = models.Category(
-                name=expense_update.category,
-                user_id=current_user.id
-            )
-            db.add(category)
-            db.commit()
-            db.refresh(category)
+    if category_name is not None:
+        category_ids, created = await db.run_sync(
+            categories.get_or_create, current_user.id, [category_name], version
+        )
+        category_id = category_ids[category_name]
     
     update_data = expense_update.dict(exclude_unset=True)
-    if "amount" in update_data:
+    if update_data.get("amount") is not None:
         expense.amount = update_data["amount"]
     if "description" in update_data:
         expense.description = update_data["description"]
-    if category:
-        expense.category_id = category.id
+    if update_data.get("date") is not None:
+        expense.date = update_data["date"]
+    if category_id is not None and category_id != old[0]:
+        # Korekcija na (predvidenata) kategorija - se koristi za retrain
+        old_category = await db.get(models.Category, old[0])
+        db.add(models.CategoryCorrection(
+            user_id=current_user.id,
+            expense_id=expense.id,
+            description=expense.description,
+            normalized_description=get_normalizer()(expense.description),
+            old_category=old_category.name if old_category else None,
+            new_category=category_name,
+        ))
+    if category_id is not None:
+        expense.category_id = category_id
     
-    db.commit()
-    db.refresh(expense)
-    
-    if category:
-        category_name = category.name
+    await db.run_sync(
+        rollups.move_expense, current_user.id, old, (expense.category_id, expense.date, expense.amount)
+    )
+    await db.commit()
+    if created:
+        categories.invalidate(current_user.id)
+    if category_id is not None:
+        overrides.invalidate(current_user.id)
     else:
-        category_obj = db.query(models.Category).filter(models.Category.id == expense.category_id).first()
+        category_obj = await db.get(models.Category, expense.category_id)
         category_name = category_obj.name if category_obj else "Unknown"
     
     return {
@@ -171,61 +514,58 @@ def update_expense(
 
 
 @router.delete("/{expense_id}")
-def delete_expense(
+async def delete_expense(
     expense_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
-    expense = db.query(models.Expense).filter(
-        models.Expense.id == expense_id,
-        models.Expense.user_id == current_user.id
-    ).first()
+    expense = await _find_expense(db, current_user.id, expense_id)
     
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    db.delete(expense)
-    db.commit()
+    await db.run_sync(rollups.remove_expense, expense)
+    await db.delete(expense)
+    db.add(models.Tombstone(
+        user_id=current_user.id,
+        entity="expense",
+        entity_id=expense.id,
+        change_version=await db.run_sync(data_version.bump, current_user.id),
+    ))
+    await db.commit()
     
     return {"message": "Expense deleted successfully"}
 
 
-@router.get("/summary/{year}/{month}", response_model=MonthlySummary)
-def get_monthly_summary(
+async def _month_totals(user_id: int, year: int, month: int) -> dict[str, float]:
+    # Sopstvena sesija: rezultatot go delat povekje requesti (single-flight)
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(rollups.month_totals, user_id, year, month)
+
+
+@router.get("/summary/{year}/{month}", response_model=MonthlySummary, dependencies=[Depends(rate_limit("summary"))])
+async def get_monthly_summary(
     year: int,
     month: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
 ):
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Invalid month (1-12)")
+
+    headers, not_modified = await data_version.validators(request, db, current_user.id)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     
-    # Get start and end of month
-    start_date = datetime(year, month, 1)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1)
-    else:
-        end_date = datetime(year, month + 1, 1)
-    
-    # Query expenses for the month
-    expenses = (
-        db.query(models.Expense, models.Category)
-        .join(models.Category)
-        .filter(
-            models.Expense.user_id == current_user.id,
-            models.Expense.date >= start_date,
-            models.Expense.date < end_date
-        )
-        .all()
+    # Konekcijata se vrakja vo pool-ot pred chekanjeto; zaednichkoto chitanje ima svoja sesija
+    await db.close()
+    category_totals = await summary_flight.do(
+        (current_user.id, year, month, headers["ETag"]), _month_totals, current_user.id, year, month
     )
-    
-    # Calculate totals by category
-    category_totals = defaultdict(float)
-    total_expenses = 0.0
-    
-    for expense, category in expenses:
-        category_totals[category.name] += expense.amount
-        total_expenses += expense.amount
+    total_expenses = sum(category_totals.values())
     
     # Get month name
     month_names = ["", "January", "February", "March", "April", "May", "June",
@@ -235,5 +575,31 @@ def get_monthly_summary(
         "month": month_names[month],
         "year": year,
         "total_expenses": round(total_expenses, 2),
-        "categories": dict(category_totals)
+        "categories": category_totals
+    }
+
+
+@router.get("/summary/range", response_model=RangeSummary, dependencies=[Depends(rate_limit("summary"))])
+async def get_range_summary(
+    start: UTCDateTime,
+    end: UTCDateTime,
+    bucket: Literal["day", "week", "month"] | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    category_totals = await db.run_sync(aggregates.category_totals, current_user.id, start, end)
+    buckets = []
+    if bucket:
+        buckets = await db.run_sync(aggregates.bucket_totals, current_user.id, start, end, bucket)
+
+    return {
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "total_expenses": round(sum(category_totals.values()), 2),
+        "categories": category_totals,
+        "buckets": buckets,
     }
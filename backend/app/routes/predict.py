@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from app.utils.nlp import predict_category
+from sqlalchemy.orm import Session
+from app.config import MAX_PREDICT_BATCH_SIZE
+from app.utils import categories, overrides, retrain
+from app.utils.dependencies import CurrentUser, get_current_user, get_db, require_admin
+from app.utils.model_registry import registry
+from app.utils.nlp import prediction_cache, predict_categories_async, predict_category_async
+from app.utils.ratelimit import rate_limit
+from app.utils.singleflight import SingleFlight
 
 router = APIRouter()
 
+# Ist opis istovremeno (npr. klient sho povtoruva) = edna inferencija
+predict_flight = SingleFlight("predict")
+
 # Request schema
 class PredictRequest(BaseModel):
     description: str
@@ -13,7 +25,89 @@ class PredictResponse(BaseModel):
     description: str
     predicted_category: str
 
-@router.post("/predict", response_model=PredictResponse)
-def predict_expense(request: PredictRequest):
-    category = predict_category(request.description)
-    return {"description": request.description, "predicted_category": category}
\ No newline at end of file
+class BatchPredictRequest(BaseModel):
+    descriptions: list[str]
+
+class BatchPredictResponse(BaseModel):
+    predictions: list[PredictResponse]
+
+class ActivateModelRequest(BaseModel):
+    version: str
+
+@router.post("/predict", response_model=PredictResponse, dependencies=[Depends(rate_limit("predict"))])
+async def predict_expense(request: PredictRequest):
+    category = await predict_flight.do(request.description, predict_category_async, request.description)
+    return {"description": request.description, "predicted_category": category}
+
+@router.post(
+    "/predict/batch", response_model=BatchPredictResponse, dependencies=[Depends(rate_limit("predict_batch"))]
+)
+async def predict_expenses_batch(request: BatchPredictRequest):
+    if len(request.descriptions) > MAX_PREDICT_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {MAX_PREDICT_BATCH_SIZE} descriptions)"
+        )
+
+    categories = await predict_categories_async(request.descriptions)
+    return {
+        "predictions": [
+            {"description": description, "predicted_category": category}
+            for description, category in zip(request.descriptions, categories)
+        ]
+    }
+
+
+@router.get("/models/status")
+def model_status():
+    return registry.status()
+
+@router.post("/models/activate", dependencies=[Depends(require_admin)])
+def activate_model(
+    request: ActivateModelRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    if request.version not in registry.versions():
+        raise HTTPException(status_code=404, detail="Model version not found")
+
+    registry.activate(request.version)
+    return registry.status()
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    return {
+        "predictions": prediction_cache.stats(),
+        "overrides": overrides.override_cache.stats(),
+        "categories": categories.category_cache.stats(),
+    }
+
+@router.get("/corrections-count")
+def corrections_count(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Korekcii sho se ushte ne se vo nitu eden model
+    return {"corrections_count": retrain.count_pending(db)}
+
+@router.post("/retrain", dependencies=[Depends(require_admin), Depends(rate_limit("retrain"))])
+def start_retrain(
+    mode: Literal["full", "incremental"] = "full",
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    if not retrain.count_pending(db):
+        return {"message": "No corrections to retrain with"}
+
+    job = retrain.start_job(mode)
+    return {"message": "Retraining started", **job}
+
+@router.get("/retrain/{job_id}")
+def retrain_status(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    job = retrain.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Retrain job not found")
+    return job
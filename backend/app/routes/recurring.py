@@ -0,0 +1,133 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.schemas import RecurringCreate, RecurringResponse, RecurringUpdate
+from app.utils import categories, overrides, recurring
+from app.utils.dependencies import CurrentUser, get_async_db, get_current_user_async
+from app.utils.nlp import predict_category_async
+
+router = APIRouter()
+
+
+def _to_response(template: models.RecurringExpense, category_names: dict[int, str]) -> dict:
+    return {
+        "id": template.id,
+        "amount": template.amount,
+        "description": template.description,
+        "category": category_names.get(template.category_id, "Unknown"),
+        "interval": template.interval,
+        "start_date": template.start_date,
+        "next_run": template.next_run,
+        "last_run": template.last_run,
+        "active": template.active,
+    }
+
+
+def _category_names(db: Session, user_id: int) -> dict[int, str]:
+    return {category_id: name for name, category_id in categories.get_category_ids(db, user_id).items()}
+
+
+async def _get_template(db: AsyncSession, user_id: int, template_id: int) -> models.RecurringExpense:
+    template = (await db.execute(
+        select(models.RecurringExpense).where(
+            models.RecurringExpense.id == template_id,
+            models.RecurringExpense.user_id == user_id,
+        )
+    )).scalar_one_or_none()
+    if not template:
+        raise HTTPException(status_code=404, detail="Recurring expense not found")
+    return template
+
+
+@router.get("/", response_model=list[RecurringResponse])
+async def get_recurring(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    templates = (await db.execute(
+        select(models.RecurringExpense)
+        .where(models.RecurringExpense.user_id == current_user.id)
+        .order_by(models.RecurringExpense.next_run)
+    )).scalars().all()
+    names = await db.run_sync(_category_names, current_user.id)
+    return [_to_response(template, names) for template in templates]
+
+
+@router.post("/", response_model=RecurringResponse)
+async def create_recurring(
+    data: RecurringCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    category_name = data.category
+    if category_name is None or category_name.strip() == "":
+        try:
+            user_overrides = await db.run_sync(overrides.get_overrides, current_user.id)
+            category_name = await predict_category_async(data.description, user_overrides)
+        except Exception:
+            category_name = "Uncategorized"
+    category_ids, created = await db.run_sync(categories.get_or_create, current_user.id, [category_name])
+
+    now = datetime.utcnow()
+    start = data.start_date or now
+    template = models.RecurringExpense(
+        user_id=current_user.id,
+        category_id=category_ids[category_name],
+        amount=data.amount,
+        description=data.description,
+        interval=data.interval,
+        start_date=start,
+        next_run=start,
+    )
+    db.add(template)
+    await db.flush()
+
+    # Ako vekje dospeal, prvoto pojavuvanje se kreira vednash, vo istata
+    # transakcija kako shablonot - retry ne pravi duplikat
+    if start <= now:
+        await db.run_sync(recurring.materialize_due, now, current_user.id)
+    await db.commit()
+    await db.refresh(template)
+    if created:
+        categories.invalidate(current_user.id)
+    return _to_response(template, await db.run_sync(_category_names, current_user.id))
+
+
+@router.put("/{template_id}", response_model=RecurringResponse)
+async def update_recurring(
+    template_id: int,
+    data: RecurringUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    template = await _get_template(db, current_user.id, template_id)
+    update_data = data.model_dump(exclude_unset=True)
+    category = update_data.pop("category", None)
+    created = False
+    if category:
+        category_ids, created = await db.run_sync(categories.get_or_create, current_user.id, [category])
+        template.category_id = category_ids[category]
+    for field, value in update_data.items():
+        if value is not None:
+            setattr(template, field, value)
+    await db.commit()
+    if created:
+        categories.invalidate(current_user.id)
+    return _to_response(template, await db.run_sync(_category_names, current_user.id))
+
+
+@router.delete("/{template_id}")
+async def delete_recurring(
+    template_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user_async),
+):
+    # Vekje kreiranite expenses ostanuvaat
+    await db.delete(await _get_template(db, current_user.id, template_id))
+    await db.commit()
+    return {"message": "Recurring expense deleted successfully"}
@@ -0,0 +1,222 @@
+# backend/app/routes/sync.py
+# Delta sync za offline klienti: se vrakja samo ona sho se promenilo od
+# tokenot na klientot (data_version na korisnikot), plus tombstones za
+# izbrishanite redovi. POST prima i batch od promeni napraveni offline.
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import MAX_SYNC_CHANGES
+from app.schemas import SyncChange, SyncRequest, SyncResponse
+from app.utils import categories, data_version, overrides, rollups
+from app.utils.dependencies import CurrentUser, get_current_user, get_db
+from app.utils.nlp import get_normalizer, predict_categories
+
+router = APIRouter()
+
+
+def _changes_since(db: Session, user_id: int, since: int) -> dict:
+    """
+    Everything that changed after `since`. The token is read first, so a
+    change committed meanwhile is at worst sent twice, never skipped.
+    """
+    token, _ = data_version.current(db, user_id)
+    # Token od druga baza ili od pred reset: klientot mora se da povleche
+    full = since <= 0 or since > token
+
+    expense_query = (
+        select(
+            models.Expense.id,
+            models.Expense.amount,
+            models.Expense.description,
+            models.Category.name.label("category"),
+            models.Expense.category_id,
+            models.Expense.date,
+            models.Expense.updated_at,
+        )
+        .join(models.Category, models.Expense.category_id == models.Category.id)
+        .where(models.Expense.user_id == user_id)
+    )
+    category_query = select(models.Category.id, models.Category.name, models.Category.updated_at).where(
+        models.Category.user_id == user_id
+    )
+    deleted = {"expenses": [], "categories": []}
+
+    if not full:
+        expense_query = expense_query.where(models.Expense.change_version > since)
+        category_query = category_query.where(models.Category.change_version > since)
+        tombstones = db.execute(
+            select(models.Tombstone.entity, models.Tombstone.entity_id).where(
+                models.Tombstone.user_id == user_id,
+                models.Tombstone.change_version > since,
+            )
+        )
+        for entity, entity_id in tombstones:
+            deleted[f"{entity}s"].append(entity_id)
+
+    expenses = [row._asdict() for row in db.execute(expense_query.order_by(models.Expense.id))]
+    category_rows = [row._asdict() for row in db.execute(category_query.order_by(models.Category.id))]
+    # SQLite mozhe povtorno da go iskoristi id-to na izbrishan red
+    live = {"expenses": {e["id"] for e in expenses}, "categories": {c["id"] for c in category_rows}}
+    deleted = {entity: [i for i in ids if i not in live[entity]] for entity, ids in deleted.items()}
+
+    return {
+        "token": token,
+        "full": full,
+        "expenses": expenses,
+        "categories": category_rows,
+        "deleted": deleted,
+    }
+
+
+def _invalid(change: SyncChange) -> str | None:
+    if change.op == "create":
+        if change.amount is None or change.description is None:
+            return "create needs amount and description"
+    elif change.id is None:
+        return f"{change.op} needs id"
+    return None
+
+
+def _apply_changes(db: Session, user_id: int, changes: list[SyncChange]) -> tuple[list[dict], bool]:
+    """
+    Apply a batch of client changes in the caller's transaction with a
+    single data version bump. Last write wins; a bad change is reported in
+    its result instead of failing the batch. Returns the results and
+    whether any category correction was recorded.
+    """
+    results = [{"client_id": c.client_id, "id": c.id, "status": "ok", "error": None} for c in changes]
+    valid = []
+    for change, result in zip(changes, results):
+        error = _invalid(change)
+        if error:
+            result.update(status="invalid", error=error)
+        else:
+            valid.append((change, result))
+    if not valid:
+        return results, False
+
+    # Kategorii: predviduvanje vo eden batch za create bez kategorija
+    to_predict = [
+        change.op == "create" and not (change.category and change.category.strip())
+        for change, _ in valid
+    ]
+    missing = [change.description for (change, _), predict in zip(valid, to_predict) if predict]
+    try:
+        predicted = iter(predict_categories(missing, overrides.get_overrides(db, user_id)))
+    except Exception:
+        predicted = iter(["Uncategorized"] * len(missing))
+    names = [
+        next(predicted) if predict else (None if change.op == "delete" else change.category)
+        for (change, _), predict in zip(valid, to_predict)
+    ]
+
+    version = data_version.bump(db, user_id)
+    category_ids, _ = categories.get_or_create(
+        db, user_id, [name for name in names if name is not None], version
+    )
+    category_names = {category_id: name for name, category_id in category_ids.items()}
+
+    ids = [c.id for c, _ in valid if c.op != "create"]
+    existing = {
+        expense.id: expense
+        for expense in db.query(models.Expense).filter(
+            models.Expense.user_id == user_id,
+            models.Expense.id.in_(ids),
+        )
+    } if ids else {}
+
+    now = datetime.utcnow()
+    deltas = []
+    corrected = False
+    for (change, result), name in zip(valid, names):
+        if change.op == "create":
+            expense = models.Expense(
+                user_id=user_id,
+                amount=change.amount,
+                description=change.description,
+                category_id=category_ids[name],
+                date=change.date or now,
+                change_version=version,
+            )
+            db.add(expense)
+            db.flush()
+            result["id"] = expense.id
+            deltas.append((user_id, expense.category_id, expense.date, expense.amount, 1))
+            continue
+
+        expense = existing.get(change.id)
+        if expense is None:
+            result.update(status="not_found", error="Expense not found")
+            continue
+
+        deltas.append((user_id, expense.category_id, expense.date, -expense.amount, -1))
+        if change.op == "delete":
+            db.delete(expense)
+            db.add(models.Tombstone(user_id=user_id, entity="expense", entity_id=expense.id, change_version=version))
+            del existing[change.id]
+            continue
+
+        if change.amount is not None:
+            expense.amount = change.amount
+        if change.description is not None:
+            expense.description = change.description
+        if change.date is not None:
+            expense.date = change.date
+        new_category_id = category_ids.get(name)
+        if new_category_id is not None and new_category_id != expense.category_id:
+            # Ista korekcija kako PUT /expenses/{id} - se koristi za retrain
+            old_category = category_names.get(expense.category_id) or getattr(
+                db.get(models.Category, expense.category_id), "name", None
+            )
+            db.add(models.CategoryCorrection(
+                user_id=user_id,
+                expense_id=expense.id,
+                description=expense.description,
+                normalized_description=get_normalizer()(expense.description),
+                old_category=old_category,
+                new_category=name,
+            ))
+            expense.category_id = new_category_id
+            corrected = True
+        expense.change_version = version
+        deltas.append((user_id, expense.category_id, expense.date, expense.amount, 1))
+
+    rollups.apply_many(db, deltas)
+    return results, corrected
+
+
+@router.get("/", response_model=SyncResponse)
+def get_changes(
+    since: int = 0,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return _changes_since(db, current_user.id, since)
+
+
+@router.post("/", response_model=SyncResponse)
+def sync(
+    payload: SyncRequest,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    if len(payload.changes) > MAX_SYNC_CHANGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_SYNC_CHANGES} changes per sync",
+        )
+
+    try:
+        results, corrected = _apply_changes(db, current_user.id, payload.changes)
+        db.commit()
+    finally:
+        # Keshot mozhebi gi vidno nekomitnatite kategorii
+        categories.invalidate(current_user.id)
+    if corrected:
+        overrides.invalidate(current_user.id)
+
+    return {**_changes_since(db, current_user.id, payload.since), "results": results}
@@ -1,5 +1,16 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, Field
+from datetime import datetime, timezone
+from typing import Annotated, Literal
+
+
+def to_naive_utc(value: datetime | None) -> datetime | None:
+    # Bazata chuva naive UTC (datetime.utcnow()); "+02:00" se pretvora, ne se brishe
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+UTCDateTime = Annotated[datetime, AfterValidator(to_naive_utc)]
 
 class UserCreate(BaseModel):#signup
     username: str
@@ -8,6 +19,10 @@ class UserLogin(BaseModel):#login
     username: str
     password: str
 
+class PasswordChange(BaseModel):
+    old_password: str
+    new_password: str
+
 class UserOut(BaseModel):
     id: int
     username: str
@@ -19,11 +34,21 @@ class ExpenseCreate(BaseModel):
     amount: float
     description: str
     category: str | None = None  # Optional - will be predicted by ML if not provided
+    date: UTCDateTime | None = None  # Optional - defaults to now
 
 class ExpenseUpdate(BaseModel):
     amount: float | None = None
     description: str | None = None
     category: str | None = None
+    date: UTCDateTime | None = None
+
+class ExpenseFilters(BaseModel):
+    start: UTCDateTime | None = None  # inclusive
+    end: UTCDateTime | None = None  # exclusive
+    category: str | None = None
+    min_amount: float | None = None
+    max_amount: float | None = None
+    q: str | None = None  # substring vo description
 
 class ExpenseResponse(BaseModel):
     id: int
@@ -36,8 +61,117 @@ class ExpenseResponse(BaseModel):
         "from_attributes": True   # <-- Pydantic v2 replacement for orm_mode
     }
 
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkExpenseResult(BaseModel):
+    created: int
+    errors: list[BulkRowError]
+
 class MonthlySummary(BaseModel):
     month: str
     year: int
     total_expenses: float
-    categories: dict[str, float]  # category -> amount
\ No newline at end of file
+    categories: dict[str, float]  # category -> amount
+
+class SummaryBucket(BaseModel):
+    period: str  # YYYY-MM-DD za day/week (pochetok na nedelata), YYYY-MM za month
+    total_expenses: float
+    categories: dict[str, float]
+
+class RangeSummary(BaseModel):
+    start: datetime
+    end: datetime
+    bucket: Literal["day", "week", "month"] | None = None
+    total_expenses: float
+    categories: dict[str, float]
+    buckets: list[SummaryBucket] = []
+
+class SyncChange(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: int | None = None  # server id, za update/delete
+    client_id: str | None = None  # id na klientot, se vrakja vo results
+    amount: float | None = None
+    description: str | None = None
+    category: str | None = None  # pri create bez kategorija se predviduva
+    date: UTCDateTime | None = None
+
+class SyncRequest(BaseModel):
+    since: int = 0  # token od prethodniot sync (0 = se od pochetok)
+    changes: list[SyncChange] = []
+
+class SyncResult(BaseModel):
+    client_id: str | None = None
+    id: int | None = None
+    status: Literal["ok", "not_found", "invalid"]
+    error: str | None = None
+
+class SyncExpense(BaseModel):
+    id: int
+    amount: float
+    description: str
+    category: str
+    category_id: int
+    date: datetime | None
+    updated_at: datetime | None
+
+class SyncCategory(BaseModel):
+    id: int
+    name: str
+    updated_at: datetime | None
+
+class SyncDeleted(BaseModel):
+    expenses: list[int] = []
+    categories: list[int] = []
+
+class SyncResponse(BaseModel):
+    token: int  # se prakja kako since vo sledniot sync
+    full: bool  # True = zameni gi site lokalni podatoci
+    expenses: list[SyncExpense]
+    categories: list[SyncCategory]
+    deleted: SyncDeleted
+    results: list[SyncResult] = []
+
+class BudgetSet(BaseModel):
+    amount: float = Field(gt=0)  # mesechen limit
+
+class BudgetStatus(BaseModel):
+    category: str
+    year: int
+    month: int
+    limit: float
+    spent: float
+    remaining: float
+    percent_used: float | None
+    projected: float  # linearna proekcija za kraj na mesecot
+    over_budget: bool
+    projected_over_budget: bool
+
+class ExpenseCreated(ExpenseResponse):
+    budget: BudgetStatus | None = None  # samo ako kategorijata ima budzhet
+
+class RecurringCreate(BaseModel):
+    amount: float
+    description: str
+    category: str | None = None  # se predviduva ako ne e dadena
+    interval: Literal["weekly", "monthly", "yearly"] = "monthly"
+    start_date: UTCDateTime | None = None  # prvoto pojavuvanje, default sega
+
+class RecurringUpdate(BaseModel):
+    amount: float | None = None
+    description: str | None = None
+    category: str | None = None
+    interval: Literal["weekly", "monthly", "yearly"] | None = None
+    active: bool | None = None
+
+class RecurringResponse(BaseModel):
+    id: int
+    amount: float
+    description: str
+    category: str
+    interval: str
+    start_date: datetime
+    next_run: datetime
+    last_run: datetime | None
+    active: bool
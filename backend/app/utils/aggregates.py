@@ -0,0 +1,80 @@
+# SQL-side aggregation for expense summaries
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def _bucket_expr(db: Session, bucket: str):
+    if db.get_bind().dialect.name == "sqlite":
+        if bucket == "day":
+            return func.strftime("%Y-%m-%d", models.Expense.date)
+        if bucket == "week":
+            # Ponedelnikot na nedelata
+            return func.date(models.Expense.date, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m", models.Expense.date)
+
+    if bucket == "month":
+        return func.to_char(func.date_trunc("month", models.Expense.date), "YYYY-MM")
+    return func.to_char(func.date_trunc(bucket, models.Expense.date), "YYYY-MM-DD")
+
+
+def category_totals(db: Session, user_id: int, start: datetime, end: datetime) -> dict[str, float]:
+    """
+    Sum of expenses per category name in [start, end), grouped in SQL.
+    """
+    rows = (
+        db.query(models.Category.name, func.sum(models.Expense.amount))
+        .join(models.Category, models.Category.id == models.Expense.category_id)
+        .filter(
+            models.Expense.user_id == user_id,
+            models.Expense.date >= start,
+            models.Expense.date < end,
+        )
+        .group_by(models.Expense.category_id, models.Category.name)
+        .all()
+    )
+
+    totals = defaultdict(float)
+    for name, amount in rows:
+        totals[name] += amount
+    return dict(totals)
+
+
+def bucket_totals(
+    db: Session, user_id: int, start: datetime, end: datetime, bucket: str
+) -> list[dict]:
+    """
+    Per-period (day/week/month) and per-category sums in [start, end),
+    ordered by period.
+    """
+    period = _bucket_expr(db, bucket).label("period")
+    rows = (
+        db.query(period, models.Category.name, func.sum(models.Expense.amount))
+        .join(models.Category, models.Category.id == models.Expense.category_id)
+        .filter(
+            models.Expense.user_id == user_id,
+            models.Expense.date >= start,
+            models.Expense.date < end,
+        )
+        .group_by(period, models.Expense.category_id, models.Category.name)
+        .order_by(period)
+        .all()
+    )
+
+    buckets: dict[str, dict[str, float]] = {}
+    for key, name, amount in rows:
+        categories = buckets.setdefault(key, defaultdict(float))
+        categories[name] += amount
+
+    return [
+        {
+            "period": key,
+            "total_expenses": round(sum(categories.values()), 2),
+            "categories": dict(categories),
+        }
+        for key, categories in buckets.items()
+    ]
@@ -0,0 +1,241 @@
+# backend/app/utils/analytics.py
+# Analitika nad site expenses na korisnikot: edno chitanje kako koloni
+# (pandas DataFrame) po data_version, a site metriki se vektorizirani.
+# Dashboard so povekje widgets = eden scan na bazata.
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import ANALYTICS_CACHE_SIZE, ANALYTICS_RESULTS_SIZE
+from app.utils import categories, data_version
+from app.utils.cache import LRUCache
+
+# MAD -> standardna devijacija za normalna raspredelba
+MAD_SCALE = 1.4826
+
+_MISSING = object()
+
+
+class UserAnalytics:
+    """
+    One user's expenses as columns plus memoized metric results. Instances
+    are cached per (user_id, data_version), so any write starts fresh. Only
+    the ANALYTICS_RESULTS_SIZE most recently used parameter combinations
+    are kept, so a client varying window/limit/threshold cannot grow it.
+    """
+
+    def __init__(self, frame: pd.DataFrame, category_names: dict[int, str]):
+        self.frame = frame
+        self.category_names = category_names
+        self._results = LRUCache(ANALYTICS_RESULTS_SIZE)
+        self._lock = threading.Lock()
+
+    def _memo(self, key, compute):
+        with self._lock:
+            result = self._results.get(key, _MISSING)
+            if result is _MISSING:
+                result = compute()
+                self._results.set(key, result)
+            return result
+
+    def category_labels(self, category_ids) -> list[str]:
+        return [self.category_names.get(int(i), "Unknown") for i in category_ids]
+
+    def trends(self) -> dict:
+        return self._memo(("trends",), lambda: yearly_trends(self.frame))
+
+    def rolling(self, window: int, days: int) -> dict:
+        return self._memo(("rolling", window, days), lambda: rolling_averages(self, window, days))
+
+    def merchants(self, limit: int) -> list[dict]:
+        return self._memo(("merchants", limit), lambda: top_merchants(self.frame, limit))
+
+    def anomalies(self, threshold: float, min_count: int, limit: int) -> list[dict]:
+        return self._memo(
+            ("anomalies", threshold, min_count, limit),
+            lambda: find_anomalies(self, threshold, min_count, limit),
+        )
+
+
+# (user_id, data_version) -> UserAnalytics
+analytics_cache = LRUCache(ANALYTICS_CACHE_SIZE)
+
+
+def load_frame(db: Session, user_id: int) -> pd.DataFrame:
+    rows = db.execute(
+        select(
+            models.Expense.id,
+            models.Expense.amount,
+            models.Expense.date,
+            models.Expense.category_id,
+            models.Expense.description,
+        ).where(models.Expense.user_id == user_id, models.Expense.date.isnot(None))
+    ).all()
+    frame = pd.DataFrame(rows, columns=["id", "amount", "date", "category_id", "description"])
+    frame["amount"] = frame["amount"].astype(np.float64)
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["description"] = frame["description"].fillna("").astype(str)
+    return frame.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def get_analytics(db: Session, user_id: int) -> UserAnalytics:
+    version, _ = data_version.current(db, user_id)
+    key = (user_id, version)
+    analytics = analytics_cache.get(key)
+    if analytics is None:
+        names = {category_id: name for name, category_id in categories.get_category_ids(db, user_id).items()}
+        analytics = UserAnalytics(load_frame(db, user_id), names)
+        analytics_cache.set(key, analytics)
+    return analytics
+
+
+def yearly_trends(frame: pd.DataFrame) -> dict:
+    """
+    Totals per year and per calendar month, each compared with the same
+    period a year earlier.
+    """
+    if frame.empty:
+        return {"years": [], "months": []}
+
+    years = frame.groupby(frame["date"].dt.year)["amount"].agg(["sum", "count"])
+    year_totals = years["sum"].reindex(range(years.index.min(), years.index.max() + 1), fill_value=0.0)
+    year_change = year_totals.pct_change(fill_method=None).replace([np.inf, -np.inf], np.nan)
+
+    monthly = frame.set_index("date")["amount"].resample("MS").sum()
+    previous = monthly.shift(12)
+    month_change = ((monthly - previous) / previous).replace([np.inf, -np.inf], np.nan)
+
+    return {
+        "years": [
+            {
+                "year": int(year),
+                "total": round(float(total), 2),
+                "count": int(years["count"].get(year, 0)),
+                "change_pct": None if np.isnan(change) else round(float(change) * 100, 2),
+            }
+            for year, total, change in zip(year_totals.index, year_totals.to_numpy(), year_change.to_numpy())
+        ],
+        "months": [
+            {
+                "month": month.strftime("%Y-%m"),
+                "total": round(float(total), 2),
+                "previous_year": None if np.isnan(prev) else round(float(prev), 2),
+                "change_pct": None if np.isnan(change) else round(float(change) * 100, 2),
+            }
+            for month, total, prev, change in zip(
+                monthly.index, monthly.to_numpy(), previous.to_numpy(), month_change.to_numpy()
+            )
+        ],
+    }
+
+
+def rolling_averages(analytics: UserAnalytics, window: int, days: int) -> dict:
+    """
+    Average daily spend over a trailing `window` days, per category, as of
+    the latest expense; plus the overall rolling series for the last `days`.
+    """
+    frame = analytics.frame
+    if frame.empty:
+        return {"window_days": window, "as_of": None, "categories": {}, "series": []}
+
+    # Dnevni zbirovi: redovi = denovi (bez praznini), koloni = kategorii
+    daily = frame.pivot_table(
+        index=frame["date"].dt.normalize(), columns="category_id", values="amount", aggfunc="sum", fill_value=0.0,
+    )
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"), fill_value=0.0)
+    per_category = daily.rolling(window, min_periods=1).sum() / window
+    overall = daily.sum(axis=1).rolling(window, min_periods=1).sum() / window
+
+    latest = per_category.iloc[-1]
+    tail = overall.iloc[-days:] if days > 0 else overall.iloc[:0]
+    return {
+        "window_days": window,
+        "as_of": daily.index[-1].date().isoformat(),
+        "categories": {
+            name: round(float(value), 2)
+            for name, value in zip(analytics.category_labels(latest.index), latest.to_numpy())
+        },
+        "series": [
+            {"date": day.date().isoformat(), "average": round(float(value), 2)}
+            for day, value in zip(tail.index, tail.to_numpy())
+        ],
+    }
+
+
+def merchant_keys(descriptions: pd.Series) -> pd.Series:
+    # "Starbucks #123 Skopje" -> "starbucks skopje": bez brojki i znaci, do 3 zborovi
+    cleaned = (
+        descriptions.str.lower()
+        .str.replace(r"[^a-z\u0400-\u04ff\s]+", " ", regex=True)
+        .str.split()
+        .str[:3]
+        .str.join(" ")
+    )
+    return cleaned.where(cleaned.str.len() > 0, "unknown")
+
+
+def top_merchants(frame: pd.DataFrame, limit: int) -> list[dict]:
+    if frame.empty:
+        return []
+
+    grouped = frame.assign(merchant=merchant_keys(frame["description"])).groupby("merchant").agg(
+        total=("amount", "sum"),
+        count=("amount", "size"),
+        average=("amount", "mean"),
+        last_date=("date", "max"),
+    )
+    top = grouped.nlargest(limit, "total")
+    return [
+        {
+            "merchant": merchant,
+            "total": round(float(total), 2),
+            "count": int(count),
+            "average": round(float(average), 2),
+            "last_date": last_date.isoformat(),
+        }
+        for merchant, total, count, average, last_date in zip(
+            top.index, top["total"], top["count"], top["average"], top["last_date"]
+        )
+    ]
+
+
+def find_anomalies(analytics: UserAnalytics, threshold: float, min_count: int, limit: int) -> list[dict]:
+    """
+    Expenses far above the user's norm for their category: a robust z-score
+    (median and MAD) above `threshold`. Categories with fewer than
+    `min_count` expenses have no meaningful norm and are skipped.
+    """
+    frame = analytics.frame
+    if frame.empty:
+        return []
+
+    amounts = frame["amount"]
+    by_category = amounts.groupby(frame["category_id"])
+    median = by_category.transform("median")
+    mad = (amounts - median).abs().groupby(frame["category_id"]).transform("median") * MAD_SCALE
+    # Ako povekje od polovina iznosi se isti, MAD e 0; togash std
+    spread = mad.where(mad > 0, by_category.transform("std"))
+    count = by_category.transform("size")
+
+    score = ((amounts - median) / spread).where((count >= min_count) & (spread > 0))
+    flagged = frame.assign(score=score, expected=median)[score > threshold]
+    flagged = flagged.nlargest(limit, "score")
+    return [
+        {
+            "id": int(row_id),
+            "amount": round(float(amount), 2),
+            "date": date.isoformat(),
+            "description": description,
+            "category": category,
+            "expected": round(float(expected), 2),
+            "score": round(float(value), 2),
+        }
+        for row_id, amount, date, description, category, expected, value in zip(
+            flagged["id"], flagged["amount"], flagged["date"], flagged["description"],
+            analytics.category_labels(flagged["category_id"]), flagged["expected"], flagged["score"],
+        )
+    ]
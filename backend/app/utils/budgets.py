@@ -0,0 +1,108 @@
+# backend/app/utils/budgets.py
+# Status na budzhetite: limitite se keshirani po korisnik, a potroshenoto e
+# vekje odrzhuvano inkrementalno vo monthly_rollups, pa proverkata na eden
+# budzhet pri create e eden lookup po primaren kluch.
+import calendar
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import BUDGET_CACHE_SIZE, BUDGET_CACHE_TTL
+from app.utils import categories
+from app.utils.cache import LRUCache
+
+# user_id -> {category_id: monthly limit}
+budget_cache = LRUCache(BUDGET_CACHE_SIZE, ttl=BUDGET_CACHE_TTL)
+
+
+def get_budgets(db: Session, user_id: int) -> dict[int, float]:
+    budgets = budget_cache.get(user_id)
+    if budgets is None:
+        rows = db.execute(
+            select(models.Budget.category_id, models.Budget.amount).where(models.Budget.user_id == user_id)
+        ).all()
+        budgets = dict(rows)
+        budget_cache.set(user_id, budgets)
+    return budgets
+
+
+def invalidate(user_id: int):
+    budget_cache.pop(user_id)
+
+
+def projected_total(spent: float, year: int, month: int, now: datetime) -> float:
+    """
+    Linear month-end projection: spend so far scaled by the share of the
+    month that has passed. Past and future months are not projected.
+    """
+    if (year, month) != (now.year, now.month):
+        return spent
+    days = calendar.monthrange(year, month)[1]
+    return spent * days / now.day
+
+
+def _status(name: str, limit: float, spent: float, year: int, month: int, now: datetime) -> dict:
+    projected = projected_total(spent, year, month, now)
+    return {
+        "category": name,
+        "year": year,
+        "month": month,
+        "limit": round(limit, 2),
+        "spent": round(spent, 2),
+        "remaining": round(limit - spent, 2),
+        "percent_used": round(spent / limit * 100, 1) if limit else None,
+        "projected": round(projected, 2),
+        "over_budget": spent > limit,
+        "projected_over_budget": projected > limit,
+    }
+
+
+def _category_names(db: Session, user_id: int) -> dict[int, str]:
+    return {category_id: name for name, category_id in categories.get_category_ids(db, user_id).items()}
+
+
+def check(db: Session, user_id: int, category_id: int, when: datetime) -> dict | None:
+    """
+    Budget status for one category in the month of `when`, or None when the
+    category has no budget. Reads the cached limit and one rollup row, so
+    it costs the same whatever the number of expenses.
+    """
+    limit = get_budgets(db, user_id).get(category_id)
+    if limit is None:
+        return None
+
+    spent = db.execute(
+        select(models.MonthlyRollup.total).where(
+            models.MonthlyRollup.user_id == user_id,
+            models.MonthlyRollup.year == when.year,
+            models.MonthlyRollup.month == when.month,
+            models.MonthlyRollup.category_id == category_id,
+        )
+    ).scalar()
+    name = _category_names(db, user_id).get(category_id, "Unknown")
+    return _status(name, limit, spent or 0.0, when.year, when.month, datetime.utcnow())
+
+
+def month_status(db: Session, user_id: int, year: int, month: int) -> list[dict]:
+    budgets = get_budgets(db, user_id)
+    if not budgets:
+        return []
+
+    spent = dict(db.execute(
+        select(models.MonthlyRollup.category_id, models.MonthlyRollup.total).where(
+            models.MonthlyRollup.user_id == user_id,
+            models.MonthlyRollup.year == year,
+            models.MonthlyRollup.month == month,
+        )
+    ).all())
+    names = _category_names(db, user_id)
+    now = datetime.utcnow()
+    return sorted(
+        (
+            _status(names.get(category_id, "Unknown"), limit, spent.get(category_id, 0.0), year, month, now)
+            for category_id, limit in budgets.items()
+        ),
+        key=lambda status: status["category"],
+    )
@@ -0,0 +1,70 @@
+# backend/app/utils/categories.py
+# Kategoriite na korisnikot (ime -> id) vo memorija, i get-or-create bez
+# duplikati preku unique indeksot na (user_id, name)
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import CATEGORY_CACHE_SIZE, CATEGORY_CACHE_TTL
+from app.utils import data_version
+from app.utils.cache import LRUCache
+
+# user_id -> {name: category_id}
+category_cache = LRUCache(CATEGORY_CACHE_SIZE, ttl=CATEGORY_CACHE_TTL)
+
+
+def get_category_ids(db: Session, user_id: int) -> dict[str, int]:
+    ids = category_cache.get(user_id)
+    if ids is None:
+        rows = db.execute(
+            select(models.Category.name, models.Category.id)
+            .where(models.Category.user_id == user_id)
+            .order_by(models.Category.id)
+        ).all()
+        ids = dict(rows)
+        category_cache.set(user_id, ids)
+    return ids
+
+
+def get_or_create(db: Session, user_id: int, names, version: int | None = None) -> tuple[dict[str, int], bool]:
+    """
+    Map category names to ids, inserting the missing ones with
+    ON CONFLICT DO NOTHING so concurrent requests never create duplicates.
+    New rows are stamped with the user's data version for delta sync;
+    without a `version` the data version is bumped here, only if needed.
+    Returns the ids and whether anything was inserted; new rows are not
+    committed here, so the caller invalidates the cache after its commit.
+    """
+    names = list(dict.fromkeys(names))
+    known = get_category_ids(db, user_id)
+    missing = [name for name in names if name not in known]
+    if not missing:
+        return {name: known[name] for name in names}, False
+
+    if version is None:
+        version = data_version.bump(db, user_id)
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(
+        insert(models.Category).on_conflict_do_nothing(index_elements=["user_id", "name"]),
+        [
+            {"user_id": user_id, "name": name, "change_version": version, "updated_at": datetime.utcnow()}
+            for name in missing
+        ],
+    )
+    rows = db.execute(
+        select(models.Category.name, models.Category.id).where(
+            models.Category.user_id == user_id,
+            models.Category.name.in_(missing),
+        )
+    ).all()
+    # Noviot red ushte ne e commit-nat, pa ne smee da ostane vo keshot
+    category_cache.pop(user_id)
+    return {**{name: known[name] for name in names if name in known}, **dict(rows)}, True
+
+
+def invalidate(user_id: int):
+    category_cache.pop(user_id)
@@ -0,0 +1,186 @@
+# backend/app/utils/compiled_model.py
+# Kompajlirana forma na TF-IDF + linearen model samo so NumPy nizi:
+# vokabular (dict lookup), idf, dense matrica na koeficienti, intercept.
+#
+# Proverka na ekvivalentnost so model.predict i export vo .npz:
+#   python -m app.utils.compiled_model [version]
+import math
+import re
+import sys
+
+import numpy as np
+
+COMPILED_FILE = "compiled_model.npz"
+
+
+class CompiledLinearModel:
+    """
+    Predicts with a dictionary lookup per token and one small dot product,
+    without calling sklearn. Works for TfidfVectorizer + linear models,
+    both one-vs-rest (LinearSVC, SGD, LogisticRegression) and one-vs-one
+    (SVC with a linear kernel).
+    """
+
+    def __init__(self, terms, idf, coef, intercept, classes, scheme, pairs,
+                 ngram_range=(1, 2), token_pattern=r"(?u)\b\w\w+\b", sublinear_tf=True, digest=""):
+        self.terms = np.asarray(terms, dtype=object)
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)  # (n_features, n_outputs)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes, dtype=object)
+        self.scheme = scheme
+        self.pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        self.ngram_range = tuple(int(n) for n in ngram_range)
+        self.token_pattern = re.compile(token_pattern)
+        self.sublinear_tf = bool(sublinear_tf)
+        # artifacts_digest na fajlovite od koi e kompajliran (prazno = nepoznato)
+        self.digest = digest
+
+    @classmethod
+    def from_sklearn(cls, model, vectorizer, label_encoder):
+        if not hasattr(vectorizer, "vocabulary_") or not hasattr(model, "coef_"):
+            raise ValueError("Only TF-IDF vectorizers with linear models can be compiled")
+        if vectorizer.analyzer != "word" or vectorizer.tokenizer or vectorizer.stop_words:
+            raise ValueError("Unsupported vectorizer settings")
+
+        coef = model.coef_
+        coef = coef.toarray() if hasattr(coef, "toarray") else np.asarray(coef)
+        n_classes = len(model.classes_)
+
+        if type(model).__name__ in ("SVC", "NuSVC"):
+            scheme = "ovo"
+            pairs = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)]
+        elif coef.shape[0] == 1:
+            # Binaren slucaj: edna granica, pozitivno = vtorata klasa
+            scheme = "binary"
+            pairs = []
+        else:
+            scheme = "ovr"
+            pairs = []
+
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, index in vectorizer.vocabulary_.items():
+            terms[index] = term
+
+        return cls(
+            terms=terms,
+            idf=vectorizer.idf_,
+            coef=coef.T,
+            intercept=np.ravel(model.intercept_),
+            classes=label_encoder.inverse_transform(model.classes_),
+            scheme=scheme,
+            pairs=pairs,
+            ngram_range=vectorizer.ngram_range,
+            token_pattern=vectorizer.token_pattern,
+            sublinear_tf=vectorizer.sublinear_tf,
+        )
+
+    def _features(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        tokens = self.token_pattern.findall(text.lower())
+        min_n, max_n = self.ngram_range
+        counts = {}
+        for n in range(min_n, max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                index = self.vocabulary.get(" ".join(tokens[i:i + n]))
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+        weights = tf * self.idf[indices]
+        norm = math.sqrt(float(weights @ weights))
+        return indices, weights / norm
+
+    def decision(self, text: str) -> np.ndarray:
+        indices, weights = self._features(text)
+        return weights @ self.coef[indices] + self.intercept
+
+    def predict_one(self, text: str) -> str:
+        scores = self.decision(text)
+        if self.scheme == "binary":
+            return self.classes[int(scores[0] > 0)]
+        if self.scheme == "ovr":
+            return self.classes[int(np.argmax(scores))]
+
+        # one-vs-one: sekoj par glasa, kako libsvm (pozitivno = prvata klasa)
+        winners = np.where(scores > 0, self.pairs[:, 0], self.pairs[:, 1])
+        votes = np.bincount(winners, minlength=len(self.classes))
+        return self.classes[int(np.argmax(votes))]
+
+    def predict(self, texts) -> list[str]:
+        return [str(self.predict_one(text)) for text in texts]
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            terms=self.terms.astype(str),
+            idf=self.idf,
+            coef=self.coef,
+            intercept=self.intercept,
+            classes=self.classes.astype(str),
+            scheme=np.array(self.scheme),
+            pairs=self.pairs,
+            ngram_range=np.array(self.ngram_range),
+            token_pattern=np.array(self.token_pattern.pattern),
+            sublinear_tf=np.array(self.sublinear_tf),
+            digest=np.array(self.digest),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                terms=data["terms"].tolist(),
+                idf=data["idf"],
+                coef=data["coef"],
+                intercept=data["intercept"],
+                classes=data["classes"].tolist(),
+                scheme=str(data["scheme"]),
+                pairs=data["pairs"],
+                ngram_range=data["ngram_range"].tolist(),
+                token_pattern=str(data["token_pattern"]),
+                sublinear_tf=bool(data["sublinear_tf"]),
+                digest=str(data["digest"]) if "digest" in data else "",
+            )
+
+
+def mismatches(compiled: CompiledLinearModel, model, vectorizer, label_encoder, texts) -> list[str]:
+    """
+    Texts where the compiled model disagrees with model.predict.
+    """
+    texts = list(texts)
+    expected = label_encoder.inverse_transform(model.predict(vectorizer.transform(texts)))
+    return [
+        text for text, want, got in zip(texts, expected, compiled.predict(texts))
+        if str(want) != got
+    ]
+
+
+if __name__ == "__main__":
+    import os
+
+    from app.config import TRAINING_CSV
+    from app.utils.model_registry import BASE_VERSION, artifacts_digest, load_bundle, version_dir
+    from app.utils.nlp import get_normalizer, load_data
+
+    version = sys.argv[1] if len(sys.argv) > 1 else BASE_VERSION
+    bundle = load_bundle(version)
+    compiled = CompiledLinearModel.from_sklearn(bundle.model, bundle.vectorizer, bundle.label_encoder)
+
+    texts = get_normalizer().normalize_many(load_data(TRAINING_CSV)["description"])
+    bad = mismatches(compiled, bundle.model, bundle.vectorizer, bundle.label_encoder, texts)
+    print(f"{len(texts) - len(bad)}/{len(texts)} predictions match model.predict")
+    for text in bad:
+        print("  mismatch:", text)
+    if bad:
+        sys.exit(1)
+
+    compiled.digest = artifacts_digest(version_dir(version))
+    path = os.path.join(version_dir(version), COMPILED_FILE)
+    compiled.save(path)
+    print("Saved", path)
@@ -0,0 +1,28 @@
+# backend/app/utils/compression.py
+# GZipMiddleware sho ne kompresira povtorno odgovori koi vekje se kompresirani
+# (GET /expenses/export?gzip=true vrakja application/gzip).
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware as _GZipMiddleware
+from starlette.middleware.gzip import GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+COMPRESSED_TYPES = ("application/gzip", "application/x-gzip", "application/zip")
+
+
+class _Responder(GZipResponder):
+    async def send_with_compression(self, message: Message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            # Telata se prakjaat nepromeneti, isto kako za text/event-stream
+            if content_type.startswith(COMPRESSED_TYPES):
+                self.content_type_is_excluded = True
+
+
+class GZipMiddleware(_GZipMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _Responder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,71 @@
+# backend/app/utils/data_version.py
+# Verzija na podatocite na korisnikot (+1 na sekoja promena na expenses ili
+# kategorii) za ETag / Last-Modified, 304 odgovori i delta sync tokenot
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def bump(db: Session, user_id: int) -> int:
+    """
+    Increment the user's data version and return the new value, which is
+    also stamped on the changed rows for delta sync. Not committed here, so
+    it lands in the same transaction as the change it describes (and holds
+    the user's row lock, keeping versions in commit order).
+    """
+    return db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(data_version=models.User.data_version + 1, data_modified_at=datetime.utcnow())
+        .returning(models.User.data_version)
+    ).scalar_one()
+
+
+def current(db: Session, user_id: int) -> tuple[int, datetime | None]:
+    row = db.execute(
+        select(models.User.data_version, models.User.data_modified_at).where(models.User.id == user_id)
+    ).first()
+    return (row[0] or 0, row[1]) if row else (0, None)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak sporedba: W/"x" i "x" se isti
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _not_modified_since(header: str, modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(microsecond=0) <= since
+
+
+async def validators(request: Request, db: AsyncSession, user_id: int) -> tuple[dict, bool]:
+    """
+    Cache headers for the user's current data version, and whether the
+    request's If-None-Match / If-Modified-Since already matches them.
+    """
+    version, modified_at = await db.run_sync(current, user_id)
+    etag = f'W/"{user_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    modified = modified_at.replace(tzinfo=timezone.utc) if modified_at else None
+    if modified:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return headers, _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified:
+        return headers, _not_modified_since(if_modified_since, modified)
+    return headers, False
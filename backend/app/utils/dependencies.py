@@ -1,41 +1,119 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from dataclasses import dataclass
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.config import ADMIN_TOKEN, USER_CACHE_SIZE, USER_CACHE_TTL
+from app.database import AsyncSessionLocal, SessionLocal
 from app import models
+from app.utils.cache import LRUCache
 from app.utils.security import SECRET_KEY, ALGORITHM
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")#FastApi avtomatski go extractnuva tokenot za nas
 
+
+@dataclass(frozen=True)
+class CurrentUser:
+    # Lesna kopija od models.User sho mozhe da se chuva vo keshot megju sesii
+    id: int
+    username: str
+    token_version: int
+
+
+user_cache = LRUCache(USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user(user_id: int):
+    user_cache.pop(user_id)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
-    credentials_exception = HTTPException(
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
 
-    user = db.query(models.User).filter(models.User.username == username).first()
+
+def _to_current(user: models.User | None) -> CurrentUser:
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return CurrentUser(user.id, user.username, user.token_version or 0)
+
 
+def _check_version(user: CurrentUser, payload: dict) -> CurrentUser:
+    if user.token_version != payload.get("ver", 0):
+        raise _credentials_exception()
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    payload = _decode(token)
+    user_id = payload.get("uid")
+
+    if user_id is None:
+        # Stari tokeni bez uid: lookup po username
+        user = db.query(models.User).filter(models.User.username == payload["sub"]).first()
+        return _to_current(user)
+
+    user = user_cache.get(user_id)
+    if user is None:
+        user = _to_current(db.get(models.User, user_id))
+        user_cache.set(user_id, user)
+    return _check_version(user, payload)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    payload = _decode(token)
+    user_id = payload.get("uid")
+
+    if user_id is None:
+        result = await db.execute(select(models.User).where(models.User.username == payload["sub"]))
+        return _to_current(result.scalars().first())
+
+    user = user_cache.get(user_id)
+    if user is None:
+        user = _to_current(await db.get(models.User, user_id))
+        user_cache.set(user_id, user)
+    return _check_version(user, payload)
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    # Menuvanjeto na modelot vazhi za site korisnici - samo za operatori
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model operations are disabled, set SMARTSPEND_ADMIN_TOKEN")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
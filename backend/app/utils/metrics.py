@@ -0,0 +1,233 @@
+# backend/app/utils/metrics.py
+# Lesni in-process metriki vo Prometheus tekst format (/metrics):
+# vreme po request, broj i vreme na SQL queries, ML inferencija i bcrypt.
+# Za sekoj request vreminjata se sobiraat i vo contextvar, za Server-Timing.
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.config import METRICS_ENABLED, SERVER_TIMING
+
+# Granici vo sekundi, od brz SQL query do bcrypt
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        for label_values, counts, total, count in sorted(items):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                sep = "," if labels else ""
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: int = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+requests_seconds = Histogram(
+    "smartspend_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+db_query_seconds = Histogram(
+    "smartspend_db_query_duration_seconds", "SQL statement latency", ("route",)
+)
+db_queries_per_request = Histogram(
+    "smartspend_db_queries_per_request", "SQL statements per HTTP request", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+span_seconds = Histogram(
+    "smartspend_span_duration_seconds", "Time in ML inference, password hashing and other spans", ("span",)
+)
+requests_total = Counter(
+    "smartspend_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+rate_limited_total = Counter(
+    "smartspend_rate_limited_total", "Requests rejected with 429 by a rate limit", ("limit",)
+)
+coalesced_total = Counter(
+    "smartspend_coalesced_total", "Requests that shared an identical in-flight computation", ("flight",)
+)
+
+# Za tekovniot request: {ime: [vkupno sekundi, broj]}
+_timings: ContextVar[dict | None] = ContextVar("smartspend_timings", default=None)
+
+
+def _record(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        entry = timings.get(name)
+        if entry is None:
+            timings[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a block into smartspend_span_duration_seconds and the current
+    request's Server-Timing breakdown.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        span_seconds.observe(elapsed, name)
+        _record(name, elapsed)
+
+
+def _route_of(scope) -> str:
+    # Templejtot (/expenses/{expense_id}), ne patekata, za ogranichen broj labels
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def _current_route() -> str:
+    timings = _timings.get()
+    return _route_of(timings["_scope"]) if timings is not None else "background"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    db_query_seconds.observe(elapsed, _current_route())
+    _record("db", elapsed)
+
+
+def instrument_engine(engine):
+    # Za async engine se predava engine.sync_engine
+    if METRICS_ENABLED:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _server_timing(timings: dict, total: float) -> bytes:
+    parts = [
+        f'{name};dur={entry[0] * 1000:.2f};desc="{entry[1]}x"'
+        for name, entry in timings.items()
+        if not name.startswith("_")
+    ]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: times every HTTP request by route template and
+    optionally adds a Server-Timing header with the request's breakdown.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = {"_scope": scope}
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - started)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = _route_of(scope)
+            requests_seconds.observe(elapsed, scope["method"], route, str(status))
+            requests_total.inc(scope["method"], route, str(status))
+            db_queries_per_request.observe(timings.get("db", (0, 0))[1], route)
+            _timings.reset(token)
+
+
+def _cache_lines(caches: dict) -> list[str]:
+    lines = []
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        name = f"smartspend_cache_{field}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} In-process cache {field}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache}"}} {cache_obj.stats()[field]}' for cache, cache_obj in caches.items()]
+    return lines
+
+
+def render(caches: dict | None = None) -> str:
+    """
+    All metrics in the Prometheus text format; caches maps a name to an
+    LRUCache whose stats are exported alongside.
+    """
+    lines = []
+    for metric in (
+        requests_total, requests_seconds, db_query_seconds, db_queries_per_request, span_seconds,
+        rate_limited_total, coalesced_total,
+    ):
+        lines.extend(metric.render())
+    if caches:
+        lines.extend(_cache_lines(caches))
+    return "\n".join(lines) + "\n"
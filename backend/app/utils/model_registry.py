@@ -0,0 +1,241 @@
+# backend/app/utils/model_registry.py
+# Lazy, versioned registry za ML artefaktite (model, vectorizer, label encoder)
+#
+# Aktivnata verzija e vo MODEL_DIR/ACTIVE, pa ja delat site workeri i
+# ostanuva po restart. Prefrlanje od komandna linija:
+#   python -m app.utils.model_registry [verzija]
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+
+import joblib
+
+from app.config import MODEL_DIR, MODEL_MMAP, MODEL_POLL_INTERVAL, SERVE_COMPILED, TRAINING_CSV
+from app.utils.compiled_model import COMPILED_FILE, CompiledLinearModel, mismatches
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BASE_VERSION = "base"
+ARTIFACTS = ("expense_model", "tfidf_vectorizer", "label_encoder")
+POINTER_FILE = "ACTIVE"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    version: str
+    model: object
+    vectorizer: object
+    label_encoder: object
+    source: str
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    load_seconds: float = 0.0
+    compiled: CompiledLinearModel | None = None
+
+
+def _artifact_path(directory: str, name: str) -> str:
+    joblib_path = os.path.join(directory, name + ".joblib")
+    return joblib_path if os.path.exists(joblib_path) else os.path.join(directory, name + ".pkl")
+
+
+def _load_artifact(directory: str, name: str):
+    path = _artifact_path(directory, name)
+    if path.endswith(".joblib"):
+        # mmap gi deli numpy nizite megju workeri namesto sekoj da ima kopija
+        return joblib.load(path, mmap_mode="r" if MODEL_MMAP else None)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def artifacts_digest(directory: str) -> str:
+    # SHA-256 na artefaktite; kompajliraniot .npz vazhi samo za istite fajlovi
+    digest = hashlib.sha256()
+    for name in ARTIFACTS:
+        with open(_artifact_path(directory, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def version_dir(version: str) -> str:
+    if version == BASE_VERSION:
+        return BASE_DIR
+    return os.path.join(MODEL_DIR, version)
+
+
+def compile_bundle(bundle: ModelBundle) -> ModelBundle:
+    """
+    Attach the NumPy serving form when the model is linear over TF-IDF and
+    it gives the same predictions as model.predict on the training CSV. A
+    saved compiled_model.npz is used only if it was exported from the same
+    artifact files; otherwise the model is compiled and checked again.
+    """
+    if not SERVE_COMPILED or bundle.compiled is not None:
+        return bundle
+
+    compiled_path = os.path.join(bundle.source, COMPILED_FILE)
+    if os.path.exists(compiled_path):
+        compiled = CompiledLinearModel.load(compiled_path)
+        if compiled.digest and compiled.digest == artifacts_digest(bundle.source):
+            return replace(bundle, compiled=compiled)
+        logger.warning("%s does not match the model files, compiling again", compiled_path)
+
+    try:
+        compiled = CompiledLinearModel.from_sklearn(bundle.model, bundle.vectorizer, bundle.label_encoder)
+    except (ValueError, AttributeError):
+        return bundle
+
+    from app.utils.nlp import get_normalizer, load_data
+    texts = get_normalizer().normalize_many(load_data(TRAINING_CSV)["description"])
+    if mismatches(compiled, bundle.model, bundle.vectorizer, bundle.label_encoder, texts):
+        return bundle
+    return replace(bundle, compiled=compiled)
+
+
+def load_bundle(version: str) -> ModelBundle:
+    directory = version_dir(version)
+    started = time.perf_counter()
+    model, vectorizer, label_encoder = (_load_artifact(directory, name) for name in ARTIFACTS)
+    bundle = ModelBundle(
+        version=version,
+        model=model,
+        vectorizer=vectorizer,
+        label_encoder=label_encoder,
+        source=directory,
+    )
+    bundle = compile_bundle(bundle)
+    return replace(bundle, load_seconds=time.perf_counter() - started)
+
+
+def save_bundle(version: str, model, vectorizer, label_encoder) -> str:
+    directory = version_dir(version)
+    os.makedirs(directory, exist_ok=True)
+    for name, artifact in zip(ARTIFACTS, (model, vectorizer, label_encoder)):
+        joblib.dump(artifact, os.path.join(directory, name + ".joblib"))
+    return directory
+
+
+def read_pointer() -> str | None:
+    try:
+        with open(os.path.join(MODEL_DIR, POINTER_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(version: str):
+    # Atomichno: workerite nikogash ne chitaat pola zapishan fajl
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = os.path.join(MODEL_DIR, POINTER_FILE)
+    with open(path + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(path + ".tmp", path)
+
+
+class ModelRegistry:
+    """
+    Holds the active ModelBundle. Callers take one bundle reference per
+    request, so swapping in a new version never affects requests that are
+    already running on the old one.
+    """
+
+    def __init__(self, default_version: str = BASE_VERSION, poll_interval: float = MODEL_POLL_INTERVAL):
+        # default_version vazhi dodeka nitu edna verzija ne e aktivirana
+        self.default_version = default_version
+        self.poll_interval = poll_interval
+        self._active: ModelBundle | None = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def active(self) -> ModelBundle:
+        bundle = self._active
+        if bundle is not None and time.monotonic() - self._checked_at < self.poll_interval:
+            return bundle
+        self._checked_at = time.monotonic()
+        version = read_pointer() or self.default_version
+        if bundle is not None and bundle.version == version:
+            return bundle
+
+        # Dodeka eden thread ja vchituva novata verzija, ostanatite rabotat so starata
+        if not self._lock.acquire(blocking=bundle is None):
+            return bundle
+        try:
+            if self._active is None or self._active.version != version:
+                try:
+                    self._set(load_bundle(version))
+                except OSError:
+                    if self._active is None:
+                        raise
+                    logger.exception("Could not load model version %s, keeping %s", version, self._active.version)
+            return self._active
+        finally:
+            self._lock.release()
+
+    def _set(self, bundle: ModelBundle):
+        self._active = bundle
+        for listener in self._listeners:
+            listener(bundle)
+
+    def publish(self, bundle: ModelBundle):
+        """
+        Make a saved version the active one for this process, and through
+        the pointer file for every other worker and after a restart.
+        """
+        bundle = compile_bundle(bundle)
+        with self._lock:
+            write_pointer(bundle.version)
+            self._set(bundle)
+
+    def activate(self, version: str) -> ModelBundle:
+        # Se vchituva nadvor od lock-ot; aktivniot model raboti dodeka trae
+        bundle = load_bundle(version)
+        self.publish(bundle)
+        return bundle
+
+    def on_publish(self, listener):
+        self._listeners.append(listener)
+
+    def versions(self) -> list[str]:
+        found = []
+        if os.path.isdir(MODEL_DIR):
+            found = sorted(
+                name for name in os.listdir(MODEL_DIR)
+                if os.path.isdir(os.path.join(MODEL_DIR, name))
+            )
+        return [BASE_VERSION] + found
+
+    def status(self) -> dict:
+        bundle = self._active
+        return {
+            "loaded": bundle is not None,
+            "active_version": bundle.version if bundle else None,
+            "source": bundle.source if bundle else None,
+            "loaded_at": bundle.loaded_at if bundle else None,
+            "load_seconds": round(bundle.load_seconds, 4) if bundle else None,
+            "model_type": type(bundle.model).__name__ if bundle else None,
+            "compiled": bundle.compiled is not None if bundle else None,
+            "published_version": read_pointer(),
+            "available_versions": self.versions(),
+        }
+
+
+registry = ModelRegistry(os.getenv("SMARTSPEND_MODEL_VERSION", BASE_VERSION))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        if sys.argv[1] not in registry.versions():
+            sys.exit(f"Unknown model version: {sys.argv[1]}")
+        registry.activate(sys.argv[1])
+        print(f"Active model version: {sys.argv[1]} (workers switch within {MODEL_POLL_INTERVAL:g}s)")
+    else:
+        print(f"Active model version: {read_pointer() or registry.default_version}")
+        print("Available:", ", ".join(registry.versions()))
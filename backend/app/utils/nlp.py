@@ -3,9 +3,16 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.feature_extraction.text import TfidfVectorizer
-import pickle
+import asyncio
+import contextvars
 import re
-import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.config import ML_WORKERS, PREDICTION_CACHE_SIZE
+from app.utils.cache import LRUCache
+from app.utils.metrics import span
+from app.utils.model_registry import registry
 
 # Try to import NLTK, fallback to basic if not available
 try:
@@ -19,29 +26,59 @@ def load_data(csv_path: str):
     return df
 
 
-def preprocess_text(df):
-    def clean_text(text):
-        # Convert to lowercase
-        text = text.lower()
-        # Remove special characters and numbers
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        
+BASIC_STOPWORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'})
+
+
+class TextNormalizer:
+    """
+    Text cleanup used for both training and prediction: lowercase, drop
+    non-letters, remove stopwords and short words, lemmatize. Everything
+    expensive (regex, stopword set, lemmatizer) is built once.
+    """
+
+    def __init__(self):
+        self.non_alpha = re.compile(r'[^a-z\s]')
+        self.stop_words = BASIC_STOPWORDS
+        self.lemmatize = lambda word: word
+
         if NLTK_AVAILABLE:
-            # Use NLTK if available
-            lemmatizer = WordNetLemmatizer()
-            stop_words = set(stopwords.words('english'))
-            words = text.split()
-            words = [lemmatizer.lemmatize(word) for word in words if word not in stop_words and len(word) > 2]
-            return ' '.join(words)
-        else:
-            # Basic preprocessing without NLTK
-            # Remove basic stopwords manually
-            basic_stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
-            words = text.split()
-            words = [word for word in words if word not in basic_stopwords and len(word) > 2]
-            return ' '.join(words)
-    
-    df['description'] = df['description'].apply(clean_text)
+            # NLTK podatocite (stopwords, wordnet) mozhe da gi nema - togash basic
+            try:
+                self.stop_words = frozenset(stopwords.words('english'))
+            except LookupError:
+                pass
+            try:
+                lemmatizer = WordNetLemmatizer()
+                lemmatizer.lemmatize('tests')
+                self.lemmatize = lru_cache(maxsize=65536)(lemmatizer.lemmatize)
+            except LookupError:
+                pass
+
+    def __call__(self, text: str) -> str:
+        text = self.non_alpha.sub('', text.lower())
+        return ' '.join(
+            self.lemmatize(word)
+            for word in text.split()
+            if word not in self.stop_words and len(word) > 2
+        )
+
+    def normalize_many(self, texts) -> list[str]:
+        return list(self.normalize_series(pd.Series(list(texts), dtype=object)))
+
+    def normalize_series(self, series: pd.Series) -> pd.Series:
+        # lower/regex vektorski, a tokenizacijata samo ednash po unikaten tekst
+        cleaned = series.fillna('').astype(str).str.lower().str.replace(self.non_alpha, '', regex=True)
+        mapping = {text: self(text) for text in cleaned.unique()}
+        return cleaned.map(mapping)
+
+
+@lru_cache(maxsize=None)
+def get_normalizer() -> TextNormalizer:
+    return TextNormalizer()
+
+
+def preprocess_text(df):
+    df['description'] = get_normalizer().normalize_series(df['description'])
     return df
 
 def split_data(df: pd.DataFrame):
@@ -52,8 +89,10 @@ def split_data(df: pd.DataFrame):
     le = LabelEncoder()
     y_encoded = le.fit_transform(y)
 
-    # Split into train and test (stratified for better distribution)
-    X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
+    # Split into train and test (stratified for better distribution,
+    # ako sekoja kategorija ima barem 2 primeri)
+    stratify = y_encoded if y.value_counts().min() >= 2 else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=stratify)
     return X_train, X_test, y_train, y_test, le
 
 def vectorize_text(X_train, X_test):
@@ -70,25 +109,79 @@ def vectorize_text(X_train, X_test):
     return X_train_vec, X_test_vec, vectorizer
 
 
-# Load saved model, vectorizer, and label encoder
+# (model version, normalized description) -> category
+prediction_cache = LRUCache(PREDICTION_CACHE_SIZE)
+registry.on_publish(lambda bundle: prediction_cache.clear())
+
+
+def _predict_normalized(bundle, texts: list[str]) -> list[str]:
+    if bundle.compiled is not None:
+        with span("ml_predict"):
+            return bundle.compiled.predict(texts)
+    with span("ml_vectorize"):
+        desc_vec = bundle.vectorizer.transform(texts)
+    with span("ml_predict"):
+        return [str(c) for c in bundle.label_encoder.inverse_transform(bundle.model.predict(desc_vec))]
+
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+def _predict_cached(texts: list[str], overrides: dict[str, str] | None) -> dict[str, str]:
+    bundle = registry.active()
+    results = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        if overrides and text in overrides:
+            results[text] = overrides[text]
+            continue
+        category = prediction_cache.get((bundle.version, text))
+        if category is None:
+            missing.append(text)
+        else:
+            results[text] = category
 
-with open(os.path.join(BASE_DIR, "expense_model.pkl"), "rb") as f:
-    model = pickle.load(f)
+    if missing:
+        for text, category in zip(missing, _predict_normalized(bundle, missing)):
+            results[text] = category
+            prediction_cache.set((bundle.version, text), category)
+    return results
 
-with open(os.path.join(BASE_DIR, "tfidf_vectorizer.pkl"), "rb") as f:
-    vectorizer = pickle.load(f)
 
-with open(os.path.join(BASE_DIR, "label_encoder.pkl"), "rb") as f:
-    label_encoder = pickle.load(f)
+def predict_category(description: str, overrides: dict[str, str] | None = None) -> str:
+    """
+    Predict the category of a single expense description.
+    overrides maps normalized descriptions to a user's own corrections.
+    """
+    text = get_normalizer()(description)
+    return _predict_cached([text], overrides)[text]
 
 
-def predict_category(description: str) -> str:
+def predict_categories(descriptions: list[str], overrides: dict[str, str] | None = None) -> list[str]:
     """
-    Predict the category of a single expense description
+    Predict the categories of many expense descriptions in one pass.
+    Duplicate and cached descriptions are predicted only once.
     """
-    desc_vec = vectorizer.transform([description.lower()])
-    pred_encoded = model.predict(desc_vec)[0]
-    category = label_encoder.inverse_transform([pred_encoded])[0]
-    return category
\ No newline at end of file
+    if not descriptions:
+        return []
+
+    normalized = get_normalizer().normalize_many(descriptions)
+    results = _predict_cached(normalized, overrides)
+    return [results[text] for text in normalized]
+
+
+# Async endpoints ja pushtaat inferencijata tuka, nadvor od event loop-ot
+_ml_executor = ThreadPoolExecutor(max_workers=ML_WORKERS, thread_name_prefix="ml")
+
+
+async def _run_ml(fn, *args):
+    # So kopija od contextvars, za ML vremeto da vleze vo metrikite na requestot
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ml_executor, contextvars.copy_context().run, fn, *args)
+
+
+async def predict_category_async(description: str, overrides: dict[str, str] | None = None) -> str:
+    return await _run_ml(predict_category, description, overrides)
+
+
+async def predict_categories_async(
+    descriptions: list[str], overrides: dict[str, str] | None = None
+) -> list[str]:
+    return await _run_ml(predict_categories, descriptions, overrides)
@@ -0,0 +1,32 @@
+# backend/app/utils/overrides.py
+# Korekciite na korisnikot za ist (normaliziran) opis imaat prednost pred modelot
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import OVERRIDE_CACHE_SIZE, OVERRIDE_CACHE_TTL
+from app.utils.cache import LRUCache
+
+# user_id -> {normalized description: category}
+override_cache = LRUCache(OVERRIDE_CACHE_SIZE, ttl=OVERRIDE_CACHE_TTL)
+
+
+def get_overrides(db: Session, user_id: int) -> dict[str, str]:
+    overrides = override_cache.get(user_id)
+    if overrides is None:
+        rows = (
+            db.query(models.CategoryCorrection.normalized_description, models.CategoryCorrection.new_category)
+            .filter(
+                models.CategoryCorrection.user_id == user_id,
+                models.CategoryCorrection.normalized_description.isnot(None),
+            )
+            .order_by(models.CategoryCorrection.id)
+            .all()
+        )
+        # Ponovite korekcii gi prebrishuvaat postarite
+        overrides = dict(rows)
+        override_cache.set(user_id, overrides)
+    return overrides
+
+
+def invalidate(user_id: int):
+    override_cache.pop(user_id)
@@ -0,0 +1,151 @@
+# backend/app/utils/ratelimit.py
+# Token bucket rate limiting po ruta i klient: korisnikot od bearer tokenot,
+# inaku IP adresata. Kofite se vo memorija na procesot, ili vo Redis
+# (SMARTSPEND_RATE_LIMIT_REDIS_URL) za da se delat megju uvicorn workeri.
+#
+#   @router.post("/predict", dependencies=[Depends(rate_limit("predict"))])
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app.config import RATE_LIMIT_BUCKETS, RATE_LIMIT_ENABLED, RATE_LIMIT_REDIS_URL, RATE_LIMITS
+from app.utils.cache import LRUCache
+from app.utils.metrics import rate_limited_total
+from app.utils.security import ALGORITHM, SECRET_KEY
+
+logger = logging.getLogger(__name__)
+FALLBACK_WARNING_INTERVAL = 60  # sekundi megju dve poraki za pad na Redis
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float  # tokeni vo sekunda
+    burst: float  # golemina na kofata
+
+
+def parse_limit(spec: str) -> Limit | None:
+    """
+    "10/60" is 10 requests per 60 seconds, "20/1:40" is 20 per second with
+    bursts of up to 40. "0" or an empty string means no limit.
+    """
+    rate, _, burst = spec.strip().partition(":")
+    count, _, seconds = rate.partition("/")
+    if not count or float(count) <= 0:
+        return None
+    count = float(count)
+    return Limit(rate=count / float(seconds or 1), burst=float(burst) if burst else count)
+
+
+class MemoryBuckets:
+    def __init__(self, maxsize: int):
+        # Istisnata kofa e kako nova (polna) - vazhi samo za neaktivni klienti
+        self._buckets = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit, now: float | None = None) -> float:
+        """
+        Take one token. Returns 0 when the request may go ahead, otherwise
+        the seconds until the next token.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (limit.burst, now)
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            if tokens >= 1:
+                self._buckets.set(key, (tokens - 1, now))
+                return 0.0
+            self._buckets.set(key, (tokens, now))
+            return (1 - tokens) / limit.rate
+
+
+# Istiot algoritam atomichno vo Redis; vremeto e od Redis, za site workeri isto
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class Limiter:
+    def __init__(self, redis_url: str = "", maxsize: int = RATE_LIMIT_BUCKETS):
+        self.memory = MemoryBuckets(maxsize)
+        self._redis_take = None
+        self._warned_at = float("-inf")
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("SMARTSPEND_RATE_LIMIT_REDIS_URL needs the redis package (pip install redis)") from e
+            client = redis.Redis.from_url(redis_url, socket_timeout=0.25)
+            self._redis_take = client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: Limit) -> float:
+        if self._redis_take is not None:
+            try:
+                return float(await self._redis_take(keys=[f"smartspend:ratelimit:{key}"], args=[limit.rate, limit.burst]))
+            except Exception as e:
+                # Redis ne e dostapen: limit po proces namesto da padnat requestite.
+                # Se loguva ednash vo interval, ne za sekoj request
+                now = time.monotonic()
+                if now - self._warned_at >= FALLBACK_WARNING_INTERVAL:
+                    self._warned_at = now
+                    logger.warning("Rate limit backend failed, using in-process buckets: %s", e)
+        return self.memory.take(key, limit)
+
+
+limiter = Limiter(RATE_LIMIT_REDIS_URL)
+
+
+def client_key(request: Request) -> str:
+    # Samo potpisot se proveruva (bez baza); nevaliden token = po IP
+    authorization = request.headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        try:
+            payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+            user = payload.get("uid") or payload.get("sub")
+            if user is not None:
+                return f"user:{user}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(name: str):
+    """
+    Dependency that applies RATE_LIMITS[name] per client. Over the limit
+    the request gets 429 with a Retry-After header.
+    """
+    limit = parse_limit(RATE_LIMITS.get(name, ""))
+
+    async def check(request: Request):
+        if limit is None or not RATE_LIMIT_ENABLED:
+            return
+        wait = await limiter.take(f"{name}:{client_key(request)}", limit)
+        if wait > 0:
+            rate_limited_total.inc(name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    return check
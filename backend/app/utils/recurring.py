@@ -0,0 +1,148 @@
+# backend/app/utils/recurring.py
+# Scheduler za recurring expenses: gi kreira site dospeani pojavuvanja vo
+# batch-ovi (eden executemany insert i eden rollup upsert po batch).
+#
+# Raboti vo pozadina na sekoi SMARTSPEND_RECURRING_INTERVAL sekundi, ili od cron:
+#   python -m app.utils.recurring
+import calendar
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import RECURRING_BATCH_SIZE, RECURRING_INTERVAL, RECURRING_MAX_CATCHUP
+from app.database import SessionLocal
+from app.utils import data_version, rollups
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("weekly", "monthly", "yearly")
+
+
+def _add_months(when: datetime, months: int, day: int) -> datetime:
+    # Denot od start_date, skaten na kraj na pokratkite meseci (31 -> 28/30)
+    month_index = when.month - 1 + months
+    year, month = when.year + month_index // 12, month_index % 12 + 1
+    return when.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(when: datetime, interval: str, start_date: datetime) -> datetime:
+    if interval == "weekly":
+        return when + timedelta(weeks=1)
+    if interval == "yearly":
+        return _add_months(when, 12, start_date.day)
+    return _add_months(when, 1, start_date.day)
+
+
+def _due_dates(template, now: datetime) -> tuple[list[datetime], datetime]:
+    dates = []
+    when = template.next_run
+    while when <= now and len(dates) < RECURRING_MAX_CATCHUP:
+        dates.append(when)
+        when = next_occurrence(when, template.interval, template.start_date)
+    return dates, when
+
+
+def materialize_due(db: Session, now: datetime | None = None, user_id: int | None = None) -> int:
+    """
+    Create every due occurrence of active templates (optionally for one
+    user only), committing one batch of templates at a time. Each template
+    is claimed with a compare-and-set on next_run, so several workers
+    running the scheduler never create the same occurrence twice.
+    Returns the number of expenses created.
+    """
+    now = now or datetime.utcnow()
+    created = 0
+    while True:
+        query = (
+            select(models.RecurringExpense)
+            .where(models.RecurringExpense.active.is_(True), models.RecurringExpense.next_run <= now)
+            .order_by(models.RecurringExpense.next_run)
+            .limit(RECURRING_BATCH_SIZE)
+        )
+        if user_id is not None:
+            query = query.where(models.RecurringExpense.user_id == user_id)
+        templates = db.execute(query).scalars().all()
+        if not templates:
+            return created
+
+        rows_by_user = defaultdict(list)
+        for template in templates:
+            dates, next_run = _due_dates(template, now)
+            claimed = db.execute(
+                update(models.RecurringExpense)
+                .where(
+                    models.RecurringExpense.id == template.id,
+                    models.RecurringExpense.next_run == template.next_run,
+                )
+                .values(next_run=next_run, last_run=dates[-1])
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                continue
+            rows_by_user[template.user_id] += [
+                {
+                    "user_id": template.user_id,
+                    "category_id": template.category_id,
+                    "amount": template.amount,
+                    "description": template.description,
+                    "date": date,
+                }
+                for date in dates
+            ]
+
+        for owner, rows in rows_by_user.items():
+            version = data_version.bump(db, owner)
+            for row in rows:
+                row.update(change_version=version, updated_at=now)
+            db.execute(insert(models.Expense), rows)
+            rollups.apply_many(db, [
+                (owner, row["category_id"], row["date"], row["amount"], 1) for row in rows
+            ])
+            created += len(rows)
+        db.commit()
+        db.expire_all()
+
+
+def run_once() -> int:
+    db = SessionLocal()
+    try:
+        return materialize_due(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _loop(interval: float):
+    while not _stop.wait(interval):
+        try:
+            run_once()
+        except Exception:
+            logger.exception("Recurring expenses run failed")
+
+
+def start_scheduler(interval: float = RECURRING_INTERVAL):
+    global _thread
+    if interval <= 0 or (_thread and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, args=(interval,), name="recurring", daemon=True)
+    _thread.start()
+
+
+def stop_scheduler():
+    _stop.set()
+
+
+if __name__ == "__main__":
+    print("Created", run_once(), "recurring expenses")
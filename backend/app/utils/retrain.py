@@ -0,0 +1,231 @@
+# backend/app/utils/retrain.py
+# Retrain vo pozadina so korekciite od korisnicite i objavuvanje na noviot model
+import copy
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import SVC
+from sqlalchemy import func, select
+
+from app import models
+from app.config import RETRAIN_HOLDOUT_SIZE, RETRAIN_MAX_JOBS, TRAINING_CSV
+from app.database import SessionLocal
+from app.utils.model_registry import ModelBundle, registry, save_bundle
+from app.utils.nlp import get_normalizer, load_data, preprocess_text, split_data, vectorize_text
+
+# Eden job odednash, nadvor od request threadovite
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain")
+_jobs: dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def pending_corrections(db) -> list[models.CategoryCorrection]:
+    return (
+        db.query(models.CategoryCorrection)
+        .filter(models.CategoryCorrection.trained_version.is_(None))
+        .order_by(models.CategoryCorrection.id)
+        .all()
+    )
+
+
+def count_pending(db) -> int:
+    # Samo COUNT vo bazata, bez vchituvanje na redovite
+    return db.execute(
+        select(func.count())
+        .select_from(models.CategoryCorrection)
+        .where(models.CategoryCorrection.trained_version.is_(None))
+    ).scalar_one()
+
+
+def _all_corrections(db) -> list[models.CategoryCorrection]:
+    return db.query(models.CategoryCorrection).order_by(models.CategoryCorrection.id).all()
+
+
+def _new_version(prefix: str) -> str:
+    return f"{prefix}-{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def _hashing_vectorizer() -> HashingVectorizer:
+    return HashingVectorizer(
+        ngram_range=(1, 2),
+        n_features=2 ** 16,
+        alternate_sign=False,
+        norm="l2",
+    )
+
+
+def train_full(corrections) -> tuple[ModelBundle, float]:
+    """
+    Refit the TF-IDF + linear SVC model on the training CSV plus every
+    recorded correction.
+    """
+    df = load_data(TRAINING_CSV)[["description", "category"]]
+    if corrections:
+        df = pd.concat([
+            df,
+            pd.DataFrame(
+                [(c.description, c.new_category) for c in corrections],
+                columns=["description", "category"],
+            ),
+        ], ignore_index=True)
+    df = preprocess_text(df)
+
+    X_train, X_test, y_train, y_test, le = split_data(df)
+    X_train_vec, X_test_vec, vectorizer = vectorize_text(X_train, X_test)
+    model = SVC(kernel="linear", C=1.0, random_state=42, class_weight="balanced")
+    model.fit(X_train_vec, y_train)
+    accuracy = accuracy_score(y_test, model.predict(X_test_vec))
+
+    version = _new_version("full")
+    source = save_bundle(version, model, vectorizer, le)
+    bundle = ModelBundle(version, model, vectorizer, le, source=source)
+    return bundle, accuracy
+
+
+@lru_cache(maxsize=1)
+def _split_dataset() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    The normalized training CSV, split once per process into (train,
+    holdout). The holdout is at most RETRAIN_HOLDOUT_SIZE rows and a fifth
+    of the data; incremental models never train on it.
+    """
+    df = preprocess_text(load_data(TRAINING_CSV)[["description", "category"]])
+    holdout = df.sample(n=min(RETRAIN_HOLDOUT_SIZE, len(df) // 5), random_state=42)
+    return df.drop(holdout.index), holdout
+
+
+def holdout_accuracy(bundle: ModelBundle) -> float:
+    # Kategorii sho modelot ne gi znae se broat kako greshki
+    holdout = _split_dataset()[1]
+    predicted = bundle.label_encoder.inverse_transform(
+        bundle.model.predict(bundle.vectorizer.transform(holdout["description"]))
+    )
+    return float(np.mean(predicted == holdout["category"].to_numpy()))
+
+
+@lru_cache(maxsize=1)
+def _bootstrap_incremental() -> ModelBundle:
+    # Prv incremental model: SGD nad HashingVectorizer, istreniran ednash po proces
+    df = _split_dataset()[0]
+    le = LabelEncoder().fit(df["category"])
+    vectorizer = _hashing_vectorizer()
+    model = SGDClassifier(loss="hinge", alpha=1e-4, random_state=42)
+    model.partial_fit(
+        vectorizer.transform(df["description"]),
+        le.transform(df["category"]),
+        classes=np.arange(len(le.classes_)),
+    )
+    return ModelBundle("incremental-base", model, vectorizer, le, source="incremental")
+
+
+def train_incremental(corrections) -> tuple[ModelBundle, float, list]:
+    """
+    partial_fit a copy of the live incremental model on the new corrections
+    only, scored on the holdout. Corrections with a category the model has
+    never seen are left pending for the next full retrain. The bundle is
+    not saved yet (empty source).
+    """
+    base = registry.active()
+    if not isinstance(base.model, SGDClassifier):
+        base = _bootstrap_incremental()
+
+    known = set(base.label_encoder.classes_)
+    usable = [c for c in corrections if c.new_category in known]
+    model = copy.deepcopy(base.model)
+    if usable:
+        texts = get_normalizer().normalize_many(c.description for c in usable)
+        model.partial_fit(
+            base.vectorizer.transform(texts),
+            base.label_encoder.transform([c.new_category for c in usable]),
+        )
+
+    bundle = ModelBundle(_new_version("incr"), model, base.vectorizer, base.label_encoder, source="")
+    return bundle, holdout_accuracy(bundle), usable
+
+
+def _run_job(job_id: str):
+    job = _jobs[job_id]
+    job["status"] = "running"
+    job["started_at"] = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        pending = pending_corrections(db)
+        if job["mode"] == "incremental":
+            bundle, accuracy, used = train_incremental(pending)
+            # Ne se objavuva model polosh od aktivniot; korekciite ostanuvaat
+            job["active_accuracy"] = holdout_accuracy(registry.active())
+            if accuracy < job["active_accuracy"]:
+                job.update(
+                    status="rejected",
+                    new_accuracy=accuracy,
+                    error=f"Holdout accuracy {accuracy:.3f} is below the active model's {job['active_accuracy']:.3f}",
+                )
+                return
+            source = save_bundle(bundle.version, bundle.model, bundle.vectorizer, bundle.label_encoder)
+            bundle = replace(bundle, source=source)
+        else:
+            bundle, accuracy = train_full(_all_corrections(db))
+            used = pending
+
+        for correction in used:
+            correction.trained_version = bundle.version
+        db.commit()
+        registry.publish(bundle)
+
+        job.update(
+            status="done",
+            version=bundle.version,
+            new_accuracy=accuracy,
+            corrections_used=len(used),
+        )
+    except Exception as e:
+        db.rollback()
+        job.update(status="failed", error=str(e))
+    finally:
+        job["finished_at"] = datetime.utcnow()
+        db.close()
+
+
+def start_job(mode: str) -> dict:
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job["status"] in ("queued", "running"):
+                return job
+
+        # Se pamtat samo poslednite RETRAIN_MAX_JOBS zavrsheni
+        finished = [key for key, old in _jobs.items() if old["status"] not in ("queued", "running")]
+        for key in finished[:max(0, len(finished) - RETRAIN_MAX_JOBS + 1)]:
+            del _jobs[key]
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "mode": mode,
+            "status": "queued",
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+            "version": None,
+            "new_accuracy": None,
+            "active_accuracy": None,
+            "corrections_used": None,
+            "error": None,
+        }
+        _jobs[job_id] = job
+
+    _executor.submit(_run_job, job_id)
+    return job
+
+
+def get_job(job_id: str) -> dict | None:
+    return _jobs.get(job_id)
@@ -0,0 +1,201 @@
+# backend/app/utils/rollups.py
+# Incremental per-user monthly rollups: (user_id, year, month, category_id) -> total, count
+#
+# Rebuild or check for drift from the raw expenses table:
+#   python -m app.utils.rollups            (report drift)
+#   python -m app.utils.rollups --rebuild  (recompute everything)
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import delete, extract, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+TOLERANCE = 0.005
+
+
+def _upsert(db: Session, rows: list[dict]):
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(models.MonthlyRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "year", "month", "category_id"],
+        set_={
+            "total": models.MonthlyRollup.total + stmt.excluded.total,
+            "count": models.MonthlyRollup.count + stmt.excluded.count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def apply_many(db: Session, changes):
+    """
+    Apply (user_id, category_id, date, amount, count) deltas. Deltas for the same
+    rollup key are merged first so each key is written once. Not committed here,
+    so it lands in the caller's transaction.
+    """
+    merged = defaultdict(lambda: [0.0, 0])
+    for user_id, category_id, date, amount, count in changes:
+        key = (user_id, date.year, date.month, category_id)
+        merged[key][0] += amount
+        merged[key][1] += count
+
+    _upsert(db, [
+        {
+            "user_id": user_id,
+            "year": year,
+            "month": month,
+            "category_id": category_id,
+            "total": total,
+            "count": count,
+        }
+        for (user_id, year, month, category_id), (total, count) in merged.items()
+    ])
+
+
+def add_expense(db: Session, expense: models.Expense):
+    apply_many(db, [(expense.user_id, expense.category_id, expense.date, expense.amount, 1)])
+
+
+def remove_expense(db: Session, expense: models.Expense):
+    apply_many(db, [(expense.user_id, expense.category_id, expense.date, -expense.amount, -1)])
+
+
+def move_expense(db: Session, user_id: int, old: tuple, new: tuple):
+    """
+    old/new are (category_id, date, amount) before and after an update.
+    """
+    if old == new:
+        return
+    apply_many(db, [
+        (user_id, old[0], old[1], -old[2], -1),
+        (user_id, new[0], new[1], new[2], 1),
+    ])
+
+
+def month_totals(db: Session, user_id: int, year: int, month: int) -> dict[str, float]:
+    rows = (
+        db.query(models.Category.name, models.MonthlyRollup.total)
+        .join(models.Category, models.Category.id == models.MonthlyRollup.category_id)
+        .filter(
+            models.MonthlyRollup.user_id == user_id,
+            models.MonthlyRollup.year == year,
+            models.MonthlyRollup.month == month,
+            models.MonthlyRollup.count > 0,
+        )
+        .all()
+    )
+
+    totals = defaultdict(float)
+    for name, total in rows:
+        totals[name] += total
+    return dict(totals)
+
+
+def _from_expenses(db: Session, user_id: int | None = None):
+    year = extract("year", models.Expense.date)
+    month = extract("month", models.Expense.date)
+    query = select(
+        models.Expense.user_id,
+        year,
+        month,
+        models.Expense.category_id,
+        func.sum(models.Expense.amount),
+        func.count(),
+    ).group_by(models.Expense.user_id, year, month, models.Expense.category_id)
+    if user_id is not None:
+        query = query.where(models.Expense.user_id == user_id)
+    return {
+        (uid, int(y), int(m), cid): (total, count)
+        for uid, y, m, cid, total, count in db.execute(query)
+    }
+
+
+def verify(db: Session, user_id: int | None = None) -> list[dict]:
+    """
+    Compare rollups against the raw expenses and return every key that drifted.
+    """
+    expected = _from_expenses(db, user_id)
+
+    query = select(
+        models.MonthlyRollup.user_id,
+        models.MonthlyRollup.year,
+        models.MonthlyRollup.month,
+        models.MonthlyRollup.category_id,
+        models.MonthlyRollup.total,
+        models.MonthlyRollup.count,
+    ).where(models.MonthlyRollup.count != 0)
+    if user_id is not None:
+        query = query.where(models.MonthlyRollup.user_id == user_id)
+    actual = {
+        (uid, y, m, cid): (total, count)
+        for uid, y, m, cid, total, count in db.execute(query)
+    }
+
+    drift = []
+    for key in expected.keys() | actual.keys():
+        exp_total, exp_count = expected.get(key, (0.0, 0))
+        act_total, act_count = actual.get(key, (0.0, 0))
+        if exp_count != act_count or abs(exp_total - act_total) > TOLERANCE:
+            drift.append({
+                "user_id": key[0],
+                "year": key[1],
+                "month": key[2],
+                "category_id": key[3],
+                "expected": (round(exp_total, 2), exp_count),
+                "actual": (round(act_total, 2), act_count),
+            })
+    return drift
+
+
+def rebuild(db: Session, user_id: int | None = None) -> int:
+    """
+    Recompute rollups from the raw expenses table and commit.
+    """
+    stmt = delete(models.MonthlyRollup)
+    if user_id is not None:
+        stmt = stmt.where(models.MonthlyRollup.user_id == user_id)
+    db.execute(stmt)
+
+    rows = _from_expenses(db, user_id)
+    _upsert(db, [
+        {
+            "user_id": uid,
+            "year": y,
+            "month": m,
+            "category_id": cid,
+            "total": total,
+            "count": count,
+        }
+        for (uid, y, m, cid), (total, count) in rows.items()
+    ])
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from app.database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild monthly rollups")
+    parser.add_argument("--rebuild", action="store_true", help="recompute rollups from expenses")
+    parser.add_argument("--user", type=int, default=None, help="only this user id")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            count = rebuild(db, args.user)
+            print(f"Rebuilt {count} rollup rows")
+        else:
+            drift = verify(db, args.user)
+            for row in drift:
+                print(row)
+            print(f"{len(drift)} drifted rollup rows")
+    finally:
+        db.close()
@@ -0,0 +1,196 @@
+# backend/app/utils/search.py
+# Full-text prebaruvanje po description na expenses.
+#
+# SQLite: FTS5 tabela expense_search (rowid = expense id) sho ja odrzhuvaat
+# triggeri na expenses, pa ja pokrivaat site pateki na zapishuvanje (CRUD,
+# bulk, sync, recurring). Zborovite (od 2 bukvi) se baraat kako prefiks, a
+# zbor bez pogodok se zamenuva so bliskite zborovi od rechnikot (typos).
+#
+# PostgreSQL: pg_trgm GIN indeks nad description (ILIKE i % go koristat).
+#
+#   python -m app.utils.search    (povtorno go gradi indeksot)
+import re
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, and_, literal_column, or_, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+
+MAX_TERMS = 8
+MAX_CORRECTIONS = 8
+MAX_CORRECTION_CHECKS = 32  # kandidati proveruvani vo redovite na korisnikot
+MIN_PREFIX = 2  # "c"* bi gi fatil skoro site redovi
+
+# Ne se vo models.Base: create_all ne smee da gi kreira kako obichni tabeli
+_metadata = MetaData()
+search_index = Table(
+    "expense_search",
+    _metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("description", String),
+    Column("owner", String),
+)
+search_vocab = Table("expense_search_vocab", _metadata, Column("term", String))
+_match = literal_column("expense_search").op("MATCH")
+
+SQLITE_DDL = [
+    # owner = "u<user_id>", za da go ogranichi pogodokot na eden korisnik vo samiot indeks
+    """CREATE VIRTUAL TABLE IF NOT EXISTS expense_search USING fts5(
+        description, owner, prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS expense_search_vocab USING fts5vocab(expense_search, 'row')",
+    """CREATE TRIGGER IF NOT EXISTS expenses_search_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expense_search(rowid, description, owner)
+        VALUES (new.id, coalesce(new.description, ''), 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_search_update AFTER UPDATE OF description, user_id ON expenses BEGIN
+        UPDATE expense_search SET description = coalesce(new.description, ''), owner = 'u' || new.user_id
+        WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_search_delete AFTER DELETE ON expenses BEGIN
+        DELETE FROM expense_search WHERE rowid = old.id;
+    END""",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_description_trgm ON expenses USING gin (description gin_trgm_ops)",
+]
+
+
+def create_index(conn: Connection):
+    if conn.dialect.name == "sqlite":
+        for ddl in SQLITE_DDL:
+            conn.execute(text(ddl))
+        rebuild(conn)
+    elif conn.dialect.name == "postgresql":
+        for ddl in POSTGRES_DDL:
+            conn.execute(text(ddl))
+
+
+def rebuild(conn: Connection):
+    # Samo SQLite; na PostgreSQL indeksot go odrzhuva bazata
+    conn.execute(search_index.delete())
+    conn.execute(text(
+        "INSERT INTO expense_search(rowid, description, owner) "
+        "SELECT id, coalesce(description, ''), 'u' || user_id FROM expenses"
+    ))
+
+
+def terms(q: str) -> list[str]:
+    return re.findall(r"[^\W_]+", q.lower())[:MAX_TERMS]
+
+
+def max_typos(term: str) -> int:
+    return 0 if len(term) < 4 else 1 if len(term) < 8 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (a swap of two neighbouring letters is
+    one edit). Stops early and returns limit + 1 once the limit is exceeded.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def corrections(db: Session, user_id: int, term: str) -> list[str]:
+    """
+    The user's indexed words within max_typos(term) edits of `term`,
+    closest first. Only words with the same first letter are compared,
+    which keeps the vocabulary scan to one range of the index.
+    """
+    limit = max_typos(term)
+    if not limit:
+        return []
+    words = db.execute(
+        select(search_vocab.c.term).where(
+            search_vocab.c.term >= term[0], search_vocab.c.term < chr(ord(term[0]) + 1)
+        )
+    ).scalars()
+    scored = []
+    for word in words:
+        distance = edit_distance(term, word, limit)
+        if distance <= limit:
+            scored.append((distance, word))
+    # Rechnikot e zaednichki za site korisnici: bez proverkata, tugji zborovi
+    # bi gi zafatile mestata. Cena: edno lookup vo indeksot po kandidat, a
+    # zbor so premnogu tugji kandidati pred sopstvenite ostanuva bez korekcija
+    found = []
+    for _, word in sorted(scored)[:MAX_CORRECTION_CHECKS]:
+        if _has_match(db, user_id, f'"{word}"'):
+            found.append(word)
+            if len(found) == MAX_CORRECTIONS:
+                break
+    return found
+
+
+def _owner(user_id: int) -> str:
+    return f'owner:"u{user_id}"'
+
+
+def _phrase(word: str) -> str:
+    return f'"{word}"*' if len(word) >= MIN_PREFIX else f'"{word}"'
+
+
+def _has_match(db: Session, user_id: int, phrase: str) -> bool:
+    query = select(search_index.c.rowid).where(_match(f"{_owner(user_id)} AND {phrase}")).limit(1)
+    return db.execute(query).first() is not None
+
+
+def match_expression(db: Session, user_id: int, words: list[str], fuzzy: bool) -> str:
+    # Sekoj zbor: prefiks; ako nema nitu eden pogodok kaj korisnikot, i bliskite zborovi
+    groups = []
+    for word in words:
+        options = [_phrase(word)]
+        if fuzzy and not _has_match(db, user_id, _phrase(word)):
+            options += [f'"{correction}"' for correction in corrections(db, user_id, word)]
+        groups.append("(" + " OR ".join(options) + ")")
+    return " AND ".join([_owner(user_id), *groups])
+
+
+def search_select(db: Session, query, user_id: int, q: str, fuzzy: bool = True):
+    """
+    Restrict an expense SELECT (see routes/expenses._expense_select) to the
+    rows matching `q`, keeping its order. None when `q` has no words.
+    """
+    words = terms(q)
+    if not words:
+        return None
+
+    if db.get_bind().dialect.name == "sqlite":
+        # MATERIALIZED: prvo pogodocite od FTS, pa lookup po id. Inaku planerot
+        # go skenira celiot (user_id, date) indeks i za retki zborovi
+        matches = (
+            select(search_index.c.rowid.label("id"))
+            .where(_match(match_expression(db, user_id, words, fuzzy)))
+            .cte("matches")
+            .prefix_with("MATERIALIZED")
+        )
+        return query.join(matches, matches.c.id == models.Expense.id)
+
+    condition = and_(*(models.Expense.description.ilike(f"%{word}%") for word in words))
+    if fuzzy:
+        condition = or_(condition, models.Expense.description.op("%")(q))
+    return query.where(condition)
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    with engine.begin() as conn:
+        create_index(conn)
+    print("Search index rebuilt")
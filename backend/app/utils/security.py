@@ -1,12 +1,26 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+
+from app.config import (
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_WORKERS,
+)
+from app.utils.metrics import span
 SECRET_KEY = "mysecret123456789"  # change this to something strong
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(
     schemes=["bcrypt"],
-    deprecated="auto"
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,  # hashevi so drug cost se rehashiraat pri login
 )
 
 def hash_password(password: str) -> str:
@@ -16,6 +30,48 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password[:72], hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    # Vrakja nov hash ako stariot e so drugi bcrypt rounds
+    return pwd_context.verify_and_update(plain_password[:72], hashed_password)
+
+
+# bcrypt se izvrshuva vo poseben, ogranichen pool za da ne go blokira
+# threadpool-ot na ostanatite sync endpoints
+if PASSWORD_HASH_EXECUTOR == "process":
+    _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+else:
+    _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+async def _run_hashing(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+    try:
+        with span("password_hash"):
+            return await asyncio.wrap_future(_executor.submit(fn, *args))
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return await _run_hashing(verify_and_update_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -34,4 +90,4 @@ def decode_access_token(token: str):
             return None
         return username
     except JWTError:
-        return None
\ No newline at end of file
+        return None
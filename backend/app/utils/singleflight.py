@@ -0,0 +1,38 @@
+# backend/app/utils/singleflight.py
+# Single-flight: istovremeni identichni baranja (ist kluch) go chekaat edno
+# zaednichko presmetuvanje namesto sekoe da go pravi posebno.
+import asyncio
+
+from app.utils.metrics import coalesced_total
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict = {}
+
+    def _done(self, key, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Greshkata ja dobivaat site sho chekaat; ova samo go smiruva asyncio ako nikoj ne chekal
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, fn, *args):
+        """
+        Return `await fn(*args)`, running it once per key at a time: callers
+        that arrive while it runs get the same result or exception. The
+        shared task is shielded, so one caller disconnecting does not cancel
+        it for the others. `fn` must not use the caller's DB session.
+        """
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            coalesced_total.inc(self.name)
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._inflight)
@@ -0,0 +1,386 @@
+# backend/benchmarks/run.py
+# Reproducibilni benchmarks za API-to i ML patekata.
+#
+#   cd backend
+#   python -m benchmarks.run                                   (default: 20 users x 500 expenses)
+#   python -m benchmarks.run --users 50 --expenses 2000 --requests 500 --concurrency 8
+#   python -m benchmarks.run --baseline benchmarks/results/baseline.json --max-regression 1.2
+#
+# Se kreira sinteticka SQLite baza vo temp folder (opisi od expenses_dataset.csv),
+# site endpoints se povikuvaat in-process preku httpx ASGITransport, a
+# rezultatite (p50/p95/p99, throughput) se zapishuvaat vo JSON.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+PASSWORD = "benchmark-password"
+
+
+def _configure_env(workdir: str):
+    # Mora pred prviot import od app, config se chita pri import. Sekogash
+    # privremena baza i modeli - benchmarkot pishuva i ne smee da ja dopre vistinskata
+    os.environ["SMARTSPEND_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["SMARTSPEND_MODEL_DIR"] = os.path.join(workdir, "models")
+    # Eden klient so golema paralelnost - bi bil ogranichen
+    os.environ["SMARTSPEND_RATE_LIMIT_ENABLED"] = "0"
+
+
+def latency_stats(samples: list[float], wall_seconds: float | None = None) -> dict:
+    """
+    p50/p95/p99/mean in milliseconds; throughput when the wall time of the
+    whole run is known.
+    """
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    stats = {
+        "count": len(ordered),
+        "p50_ms": round(pct(50), 4),
+        "p95_ms": round(pct(95), 4),
+        "p99_ms": round(pct(99), 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+    if wall_seconds:
+        stats["throughput_rps"] = round(len(ordered) / wall_seconds, 2)
+    return stats
+
+
+def seed(n_users: int, expenses_per_user: int, rng: random.Random) -> list[dict]:
+    """
+    Fill the benchmark database directly (no API calls) and return
+    [{id, username, token}] for every user.
+    """
+    from sqlalchemy import insert
+
+    from app import models
+    from app.config import TRAINING_CSV
+    from app.database import SessionLocal
+    from app.utils import rollups
+    from app.utils.nlp import load_data
+    from app.utils.security import create_access_token, hash_password
+
+    dataset = load_data(TRAINING_CSV)[["description", "category"]].dropna()
+    samples = list(dataset.itertuples(index=False, name=None))
+    category_names = sorted({category for _, category in samples})
+    password_hash = hash_password(PASSWORD)  # eden hash za site, bcrypt e skap
+    now = datetime.utcnow()
+
+    users = []
+    db = SessionLocal()
+    try:
+        for i in range(n_users):
+            user = models.User(username=f"bench{i}", password=password_hash, token_version=0,
+                               data_version=1, data_modified_at=now)
+            db.add(user)
+            db.flush()
+            category_ids = {}
+            for name in category_names:
+                category = models.Category(name=name, user_id=user.id, change_version=1, updated_at=now)
+                db.add(category)
+                db.flush()
+                category_ids[name] = category.id
+
+            rows = []
+            for _ in range(expenses_per_user):
+                description, category = rng.choice(samples)
+                rows.append({
+                    "user_id": user.id,
+                    "category_id": category_ids[category],
+                    "amount": round(rng.uniform(1, 300), 2),
+                    "description": description,
+                    "date": now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+                    "change_version": 1,
+                    "updated_at": now,
+                })
+            if rows:
+                db.execute(insert(models.Expense), rows)
+            users.append({
+                "id": user.id,
+                "username": user.username,
+                "token": create_access_token(
+                    {"sub": user.username, "uid": user.id, "ver": 0}, timedelta(hours=12)
+                ),
+            })
+        db.commit()
+        rollups.rebuild(db)
+    finally:
+        db.close()
+    return users
+
+
+def _unique_word(i: int) -> str:
+    # Normalizerot gi brishe cifrite i zborovite do 2 bukvi: "x17" ne pravi
+    # nov opis, pa zborot e od soglaski (bez "s", lematizatorot ja skratuva)
+    letters = "bcdfghjklmnpqrtvwxz"
+    word = ""
+    while True:
+        i, digit = divmod(i, len(letters))
+        word += letters[digit]
+        if not i:
+            return "zq" + word
+
+
+def _scenarios(users: list[dict], descriptions: list[str], rng: random.Random) -> list[tuple]:
+    """
+    (name, method, path, body factory, share of --requests). The factory
+    gets a per-request counter so bodies can be made unique.
+    """
+    today = datetime.utcnow()
+    start = (today - timedelta(days=90)).strftime("%Y-%m-%dT00:00:00")
+    end = today.strftime("%Y-%m-%dT23:59:59")
+    return [
+        ("GET /expenses/", "GET", "/expenses/", None, 1.0),
+        ("GET /expenses/?limit=50", "GET", "/expenses/?limit=50", None, 1.0),
+        ("GET /expenses/ (304)", "GET", "/expenses/", "etag", 1.0),
+        ("GET /categories/", "GET", "/categories/", None, 1.0),
+        ("GET /expenses/summary/{year}/{month}", "GET",
+         f"/expenses/summary/{today.year}/{today.month}", None, 1.0),
+        ("GET /expenses/summary/range?bucket=week", "GET",
+         f"/expenses/summary/range?start={start}&end={end}&bucket=week", None, 1.0),
+        ("GET /sync/?since=1", "GET", "/sync/?since=1", None, 1.0),
+        ("GET /expenses/search?q=coffee", "GET", "/expenses/search?q=coffee&limit=50", None, 1.0),
+        ("GET /expenses/search?q=cofee (typo)", "GET", "/expenses/search?q=cofee&limit=50", None, 1.0),
+        ("POST /ml/predict (cached)", "POST", "/ml/predict",
+         lambda i: {"description": rng.choice(descriptions)}, 1.0),
+        ("POST /ml/predict (uncached)", "POST", "/ml/predict",
+         lambda i: {"description": f"{rng.choice(descriptions)} {_unique_word(i)}"}, 1.0),
+        ("POST /ml/predict/batch (50)", "POST", "/ml/predict/batch",
+         lambda i: {"descriptions": [
+             f"{d} {_unique_word(i * 50 + j)}" for j, d in enumerate(rng.sample(descriptions, min(50, len(descriptions))))
+         ]},
+         0.2),
+        ("POST /expenses/ (predicted category)", "POST", "/expenses/",
+         lambda i: {"amount": round(rng.uniform(1, 300), 2), "description": rng.choice(descriptions)}, 1.0),
+        ("POST /auth/login", "POST", "/auth/login",
+         "login", 0.1),
+    ]
+
+
+async def run_endpoints(users, descriptions, n_requests: int, concurrency: int, warmup: int,
+                        rng: random.Random, only: str | None) -> dict:
+    import httpx
+
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etags = {}
+        for user in users:
+            response = await client.get("/expenses/", headers={"Authorization": f"Bearer {user['token']}"})
+            etags[user["id"]] = response.headers.get("etag")
+
+        for name, method, path, body, share in _scenarios(users, descriptions, rng):
+            if only and only not in name:
+                continue
+            total = max(10, int(n_requests * share))
+            counter = iter(range(total + warmup * concurrency))
+
+            def request_args(user):
+                headers = {"Authorization": f"Bearer {user['token']}"}
+                i = next(counter, 0)
+                if body == "etag":
+                    headers["If-None-Match"] = etags[user["id"]]
+                    return {"headers": headers}
+                if body == "login":
+                    return {"json": {"username": user["username"], "password": PASSWORD}}
+                if callable(body):
+                    return {"headers": headers, "json": body(i)}
+                return {"headers": headers}
+
+            async def worker(count: int, samples: list[float], errors: list[int]):
+                for _ in range(count):
+                    user = rng.choice(users)
+                    kwargs = request_args(user)
+                    started = time.perf_counter()
+                    response = await client.request(method, path, **kwargs)
+                    samples.append(time.perf_counter() - started)
+                    if response.status_code >= 400:
+                        errors.append(response.status_code)
+
+            await asyncio.gather(*(worker(warmup, [], []) for _ in range(concurrency)))
+
+            samples, errors = [], []
+            per_worker = [total // concurrency + (1 if w < total % concurrency else 0) for w in range(concurrency)]
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(count, samples, errors) for count in per_worker))
+            wall = time.perf_counter() - started
+
+            stats = latency_stats(samples, wall)
+            stats["errors"] = len(errors)
+            results[name] = stats
+            print(f"{name:<42}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                  f"{stats['throughput_rps']:>10.1f}{stats['errors']:>7}")
+    return results
+
+
+def _time_calls(fn, repeats: int) -> dict:
+    samples = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return latency_stats(samples, sum(samples))
+
+
+def run_micro(descriptions: list[str], repeats: int, only: str | None) -> dict:
+    from app.config import BCRYPT_ROUNDS
+    from app.utils.model_registry import registry
+    from app.utils.nlp import get_normalizer, predict_category, prediction_cache
+    from app.utils.security import hash_password, verify_password
+
+    bundle = registry.active()
+    normalizer = get_normalizer()
+    normalized = [normalizer(d) for d in descriptions]
+    password_hash = hash_password(PASSWORD)
+
+    def pick(i):
+        return normalized[i % len(normalized)]
+
+    benchmarks = {
+        "normalize": lambda i: normalizer(descriptions[i % len(descriptions)]),
+        "vectorize": lambda i: bundle.vectorizer.transform([pick(i)]),
+        "sklearn predict (vectorized)": lambda i: bundle.model.predict(bundle.vectorizer.transform([pick(i)])),
+        "predict_category (cached)": lambda i: predict_category(descriptions[i % len(descriptions)]),
+        "predict_category (uncached)": lambda i: (prediction_cache.clear(),
+                                                  predict_category(descriptions[i % len(descriptions)])),
+        f"bcrypt hash (rounds={BCRYPT_ROUNDS})": lambda i: hash_password(PASSWORD),
+        f"bcrypt verify (rounds={BCRYPT_ROUNDS})": lambda i: verify_password(PASSWORD, password_hash),
+    }
+    if bundle.compiled is not None:
+        benchmarks["compiled predict_one"] = lambda i: bundle.compiled.predict_one(pick(i))
+
+    results = {}
+    for name, fn in benchmarks.items():
+        if only and only not in name:
+            continue
+        # bcrypt e namerno baven, pomalku povtoruvanja
+        count = max(5, repeats // 50) if name.startswith("bcrypt") else repeats
+        fn(0)
+        stats = _time_calls(fn, count)
+        results[name] = stats
+        print(f"{name:<42}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+              f"{stats['throughput_rps']:>10.1f}")
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    p95 ratios against a stored run; returns the benchmarks slower than
+    max_regression x baseline.
+    """
+    regressions = []
+    print(f"\n{'vs baseline (p95)':<42}{'base':>10}{'now':>10}{'ratio':>8}")
+    for section in ("endpoints", "micro"):
+        for name, stats in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if not base or not base.get("p95_ms"):
+                continue
+            ratio = stats["p95_ms"] / base["p95_ms"]
+            flag = "  <-- slower" if ratio > max_regression else ""
+            print(f"{name:<42}{base['p95_ms']:>10.2f}{stats['p95_ms']:>10.2f}{ratio:>8.2f}{flag}")
+            if ratio > max_regression:
+                regressions.append(name)
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SmartSpend API and ML path")
+    parser.add_argument("--users", type=int, default=20, help="synthetic users")
+    parser.add_argument("--expenses", type=int, default=500, help="expenses per user")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent in-process clients")
+    parser.add_argument("--warmup", type=int, default=5, help="warmup requests per client")
+    parser.add_argument("--micro-repeats", type=int, default=1000, help="calls per micro-benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and request mix")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this")
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", help="JSON results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.2,
+                        help="fail when a p95 is this many times the baseline")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="smartspend-bench-")
+    _configure_env(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from app.config import TRAINING_CSV
+    from app.main import app  # noqa: F401  (kreira tabeli i migracii)
+    from app.utils.nlp import load_data
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    users = seed(args.users, args.expenses, rng)
+    seed_seconds = time.perf_counter() - started
+    print(f"Seeded {args.users} users x {args.expenses} expenses in {seed_seconds:.2f}s ({workdir})\n")
+
+    descriptions = load_data(TRAINING_CSV)["description"].dropna().astype(str).tolist()
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "seed_seconds": round(seed_seconds, 3),
+        },
+        "endpoints": {},
+        "micro": {},
+    }
+
+    header = f"{'':<42}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    if not args.skip_endpoints:
+        print(header + f"{'errors':>7}")
+        results["endpoints"] = asyncio.run(run_endpoints(
+            users, descriptions, args.requests, args.concurrency, args.warmup, rng, args.only,
+        ))
+        print()
+    if not args.skip_micro:
+        print(header)
+        results["micro"] = run_micro(descriptions, args.micro_repeats, args.only)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed more than {args.max_regression}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, select, text
+
+from app import models
+from app.migrations import MIGRATIONS, run_migrations
+
+# Shemata pred prvata migracija (originalnite users, categories, expenses)
+BASELINE_DDL = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR UNIQUE, password VARCHAR)",
+    "CREATE TABLE categories (id INTEGER PRIMARY KEY, name VARCHAR, user_id INTEGER REFERENCES users (id))",
+    """CREATE TABLE expenses (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER REFERENCES users (id),
+        category_id INTEGER REFERENCES categories (id),
+        amount FLOAT,
+        description VARCHAR,
+        date DATETIME
+    )""",
+]
+
+
+def test_upgrade_baseline_with_duplicate_categories(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        for ddl in BASELINE_DDL:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO users (id, username, password) VALUES (1, 'a', 'x')"))
+        conn.execute(text("INSERT INTO categories (id, name, user_id) VALUES (1, 'Food', 1), (2, 'Food', 1)"))
+        conn.execute(
+            text("INSERT INTO expenses (user_id, category_id, amount, description, date) VALUES (1, :c, 10, 'lunch', :d)"),
+            [{"c": 1, "d": datetime(2026, 3, 1)}, {"c": 2, "d": datetime(2026, 3, 2)}],
+        )
+
+    # Kako app.main: novite tabeli so create_all, pa migraciite
+    models.Base.metadata.create_all(bind=engine)
+    assert run_migrations(engine) == [revision for revision, _ in MIGRATIONS]
+
+    with engine.connect() as conn:
+        assert conn.execute(select(models.Category.id)).scalars().all() == [1]
+        assert set(conn.execute(select(models.Expense.category_id)).scalars()) == {1}
+        rollup = conn.execute(select(models.MonthlyRollup.total, models.MonthlyRollup.count)).one()
+        assert tuple(rollup) == (20, 2)
+    assert run_migrations(engine) == []